@@ -15,46 +15,116 @@ Version: 1.0
 """
 
 # Core Flask imports
-from flask import Flask, request, jsonify, Response
+from flask import Flask, request, jsonify, Response, stream_with_context
+from flask.json.provider import JSONProvider, DefaultJSONProvider
+from werkzeug.http import generate_etag
 from flask_cors import CORS
 
 # Firebase imports for database management
 import firebase_admin
 from firebase_admin import credentials, firestore
+from google.cloud.firestore_v1.base_query import FieldFilter
 
 # Standard library imports
 import os
+import queue
 import random
-import json
 import time
+import atexit
+import functools
+import gzip
+import itertools
+import logging
+import math
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from datetime import datetime
 
 # Third-party imports
 from dotenv import load_dotenv  # For environment variable management
-import requests  # For HTTP requests
 from email.mime.text import MIMEText  # For email composition
 from email.mime.multipart import MIMEMultipart  # For email composition
 import smtplib  # For sending emails
 import google.generativeai as genai  # For AI commentary generation
+from google.api_core.exceptions import DeadlineExceeded, NotFound, ResourceExhausted, ServiceUnavailable  # Retryable API errors
+import orjson  # Fast JSON encoding for API responses and match streams
 
 # Load environment variables from .env file
 # This allows us to keep sensitive data like API keys secure
 load_dotenv()
 
+# Configure logging once for the whole process; LOG_LEVEL controls verbosity
+logging.basicConfig(
+    level=os.getenv('LOG_LEVEL', 'INFO'),
+    format='%(asctime)s %(levelname)s %(name)s: %(message)s'
+)
+logger = logging.getLogger(__name__)
+
 # Initialize Flask application
 app = Flask(__name__)
 
+
+class ORJSONProvider(JSONProvider):
+    """Flask JSON provider that encodes responses and parses requests with orjson"""
+    
+    @staticmethod
+    def dumpb(obj):
+        """Encode obj to JSON bytes"""
+        # Fall back to Flask's default encoder for types orjson does not know
+        return orjson.dumps(obj, default=DefaultJSONProvider.default, option=orjson.OPT_NON_STR_KEYS)
+    
+    def dumps(self, obj, **kwargs):
+        return self.dumpb(obj).decode()
+    
+    def response(self, *args, **kwargs):
+        # Build jsonify() responses straight from orjson's bytes, skipping the
+        # decode to str and Werkzeug's re-encode
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumpb(obj), mimetype='application/json')
+    
+    def loads(self, s, **kwargs):
+        # Used by request.get_json() / request.json for incoming payloads
+        return orjson.loads(s)
+
+
+# Use orjson for every jsonify() response
+app.json = ORJSONProvider(app)
+
 # Enable Cross-Origin Resource Sharing (CORS)
-# Using Flask-CORS to handle all CORS headers automatically
-CORS(app, resources={r"/*": {"origins": "*"}})
+# Using Flask-CORS to handle all CORS headers automatically.
+# CORS_ORIGINS is a comma-separated list of allowed frontend origins; preflight
+# responses are cacheable by the browser for 24 hours so repeated API calls do
+# not each pay for an OPTIONS round trip.
+CORS_ORIGINS = [origin.strip() for origin in os.getenv('CORS_ORIGINS', '*').split(',') if origin.strip()]
+CORS(
+    app,
+    resources={r"/api/*": {"origins": CORS_ORIGINS}},
+    methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'],
+    allow_headers=['Content-Type', 'Authorization'],
+    max_age=86400
+)
 
 
 # ============================================================================
 # FIREBASE CONFIGURATION
 # ============================================================================
 
-# Initialize Firebase Admin SDK for database operations
-try:
+# Firestore client and shared collection references. These are created lazily by
+# init_firebase() in each worker process rather than at import time, so worker
+# boot is not blocked on credential parsing and gRPC channels are never
+# inherited across a fork.
+db = None
+TEAMS_COL = None
+TOURNAMENT_DOC = None
+
+_firebase_lock = threading.Lock()
+_firebase_initialized = False
+
+@functools.lru_cache(maxsize=1)
+def load_firebase_credentials():
+    """Build Firebase credentials from the environment, parsing the private key only once"""
     # Try to get Firebase credentials from individual environment variables
     firebase_type = os.getenv('FIREBASE_TYPE')
     firebase_project_id = os.getenv('FIREBASE_PROJECT_ID')
@@ -74,29 +144,318 @@ try:
             "token_uri": os.getenv('FIREBASE_TOKEN_URI')
         }
         cred = credentials.Certificate(cred_dict)
-        print("🔑 Using Firebase credentials from environment variables")
+        logger.info("Using Firebase credentials from environment variables")
     elif os.path.exists('firebase-credentials.json'):
         # Use service account file for local development
         cred = credentials.Certificate('firebase-credentials.json')
-        print("🔑 Using Firebase service account file")
+        logger.info("Using Firebase service account file")
     else:
         # Fallback to application default credentials
         cred = credentials.ApplicationDefault()
-        print("🔑 Using Firebase application default credentials")
+        logger.info("Using Firebase application default credentials")
+    
+    return cred
+
+def init_firebase():
+    """Initialize the Firebase Admin SDK and Firestore client once per process"""
+    global db, TEAMS_COL, TOURNAMENT_DOC, _firebase_initialized
     
-    # Initialize Firebase app with credentials
-    firebase_admin.initialize_app(cred, {
-        'projectId': os.getenv('FIREBASE_PROJECT_ID', 'africannationsleague')
-    })
+    if _firebase_initialized:
+        return db
     
-    # Get Firestore database client
-    db = firestore.client()
-    print("✅ Firebase initialized successfully")
+    with _firebase_lock:
+        if _firebase_initialized:
+            return db
+        
+        try:
+            cred = load_firebase_credentials()
+            
+            # Initialize Firebase app with credentials
+            firebase_admin.initialize_app(cred, {
+                'projectId': os.getenv('FIREBASE_PROJECT_ID', 'africannationsleague')
+            })
+            
+            # Get Firestore database client
+            db = firestore.client()
+            logger.info("Firebase initialized successfully")
+            
+        except Exception:
+            logger.exception("Firebase initialization error - database operations will not work without Firebase")
+            db = None
+                
+        # Shared collection/document references, created once instead of on every request
+        TEAMS_COL = db.collection('teams') if db else None
+        TOURNAMENT_DOC = db.collection('tournament').document('current') if db else None
+        
+        _firebase_initialized = True
+    
+    return db
+
+def get_documents(doc_refs):
+    """Fetch several documents in one batched read, returned in the order requested"""
+    snapshots = {snapshot.reference.path: snapshot for snapshot in db.get_all(doc_refs)}
+    return [snapshots[doc_ref.path] for doc_ref in doc_refs]
+
+# Team documents do not change once a tournament is under way, so matches
+# reuse them from an in-process LRU cache instead of reading both teams again
+TEAM_CACHE_SIZE = 64
+_team_cache = OrderedDict()
+_team_cache_lock = threading.Lock()
+_team_cache_generation = 0
+
+def invalidate_team_cache():
+    """Drop cached teams after any write to the teams collection"""
+    global _team_cache_generation
+    with _team_cache_lock:
+        _team_cache.clear()
+        _team_cache_generation += 1
+
+def get_teams_by_id(team_ids):
+    """
+    Fetch teams by id, reading only the ones not already cached.
+
+    Returns one dict per id (with 'id' set), or None for a missing team. Each
+    caller gets its own copy of the cached dict.
+    """
+    teams = {}
+    with _team_cache_lock:
+        generation = _team_cache_generation
+        for team_id in team_ids:
+            if team_id in _team_cache:
+                _team_cache.move_to_end(team_id)
+                teams[team_id] = _team_cache[team_id]
+
+    missing = [team_id for team_id in team_ids if team_id not in teams]
+    if missing:
+        docs = get_documents([TEAMS_COL.document(team_id) for team_id in missing])
+        with _team_cache_lock:
+            for team_id, doc in zip(missing, docs):
+                if not doc.exists:
+                    continue
+                team = doc.to_dict()
+                team['id'] = team_id
+                teams[team_id] = team
+                # A read that raced with a write may be stale; use it but don't keep it
+                if generation == _team_cache_generation:
+                    _team_cache[team_id] = team
+                    if len(_team_cache) > TEAM_CACHE_SIZE:
+                        _team_cache.popitem(last=False)
+
+    return [dict(teams[team_id]) if team_id in teams else None for team_id in team_ids]
+
+# Firestore rejects write batches with more than 500 operations
+FIRESTORE_BATCH_LIMIT = 500
+
+def bulk_write(docs, merge=False):
+    """
+    Write many documents with as few RPCs as possible.
+    
+    docs is an iterable of (document_reference, data) pairs. Writes are grouped
+    into WriteBatch commits of at most FIRESTORE_BATCH_LIMIT operations, and
+    multiple batches are committed concurrently.
+    """
+    docs = list(docs)
+    if not docs:
+        return
+    
+    batches = []
+    for start in range(0, len(docs), FIRESTORE_BATCH_LIMIT):
+        batch = db.batch()
+        for doc_ref, data in docs[start:start + FIRESTORE_BATCH_LIMIT]:
+            batch.set(doc_ref, data, merge=merge)
+        batches.append(batch)
+    
+    if len(batches) == 1:
+        batches[0].commit()
+        return
+    
+    with ThreadPoolExecutor(max_workers=min(len(batches), 40)) as executor:
+        # list() surfaces the first commit error, if any
+        list(executor.map(lambda batch: batch.commit(), batches))
+
+# Errors that mean Firestore is briefly unavailable or overloaded rather than
+# that the request is wrong; clients are told to retry instead of getting a 500
+FIRESTORE_TRANSIENT_ERRORS = (DeadlineExceeded, ResourceExhausted, ServiceUnavailable)
+FIRESTORE_RETRY_AFTER = 5  # seconds
+_SERVICE_UNAVAILABLE_BODY = orjson.dumps({'error': 'Database temporarily unavailable, please retry shortly'})
+
+def error_response(e):
+    """JSON response for an endpoint that failed with exception e"""
+    if isinstance(e, FIRESTORE_TRANSIENT_ERRORS):
+        return Response(_SERVICE_UNAVAILABLE_BODY, status=503, mimetype='application/json',
+                        headers={'Retry-After': str(FIRESTORE_RETRY_AFTER)})
+    return jsonify({'error': str(e)}), 500
+
+# Retries for Firestore writes that fail with transient errors. The delay
+# doubles on each attempt, plus random jitter
+FIRESTORE_MAX_RETRIES = 3
+FIRESTORE_RETRY_BASE_DELAY = 0.2  # seconds
+
+def _set_with_retry(doc_ref, data):
+    """Write a document, backing off and retrying on transient Firestore errors"""
+    for attempt in range(FIRESTORE_MAX_RETRIES + 1):
+        try:
+            return doc_ref.set(data)
+        except (ServiceUnavailable, DeadlineExceeded) as e:
+            if attempt == FIRESTORE_MAX_RETRIES:
+                raise
+            delay = FIRESTORE_RETRY_BASE_DELAY * 2 ** attempt
+            logger.warning("Firestore write failed (%s), retrying in %.1fs", e, delay)
+            time.sleep(delay + random.uniform(0, delay))
+
+# Top-level bracket fields a result in each round can change (the round itself
+# plus whatever the winners advance into)
+BRACKET_FIELDS_BY_ROUND = {
+    'quarterFinal': ('quarterFinals', 'semiFinals'),
+    'semiFinal': ('semiFinals', 'final'),
+    'final': ('final', 'status'),
+}
+
+def bracket_round_fields(bracket, match_type):
+    """The bracket fields touched by a match in the given round.
+
+    Firestore field paths cannot address array elements, so the round's match
+    list is the smallest unit that can be updated.
+    """
+    return {field: bracket[field] for field in BRACKET_FIELDS_BY_ROUND[match_type] if field in bracket}
+
+# The read-only endpoints share one read of the tournament document for a few
+# seconds, so a dashboard loading the bracket, scorers, history and analytics
+# together reads it once. Other instances' writes show up once it expires
+TOURNAMENT_CACHE_TTL = 20
+_tournament_cache = {'bracket': None, 'expires': 0.0}
+_tournament_cache_lock = threading.Lock()
+_tournament_cache_generation = 0
+
+def invalidate_tournament_cache():
+    """Forget the shared tournament read after any bracket write"""
+    global _tournament_cache_generation
+    with _tournament_cache_lock:
+        _tournament_cache['expires'] = 0.0
+        _tournament_cache_generation += 1
+
+def get_current_tournament():
+    """The current bracket for read-only use, or None if there is no tournament"""
+    now = time.monotonic()
+    with _tournament_cache_lock:
+        if now < _tournament_cache['expires']:
+            return _tournament_cache['bracket']
+        generation = _tournament_cache_generation
     
-except Exception as e:
-    print(f"❌ Firebase initialization error: {e}")
-    print("⚠️  Database operations will not work without Firebase")
-    db = None
+    tournament_doc = TOURNAMENT_DOC.get()
+    bracket = tournament_doc.to_dict() if tournament_doc.exists else None
+    with _tournament_cache_lock:
+        # Don't keep a read that raced with a bracket write
+        if generation == _tournament_cache_generation:
+            _tournament_cache['bracket'] = bracket
+            _tournament_cache['expires'] = now + TOURNAMENT_CACHE_TTL
+    return bracket
+
+# ============================================================================
+# RESPONSE CACHE
+# ============================================================================
+
+# Seconds a cached GET response stays fresh, and how many responses are kept
+RESPONSE_CACHE_TTL = 10
+RESPONSE_CACHE_SIZE = 128
+
+# Bodies at least this big are also kept gzip-compressed, for clients that
+# accept it. JSON of repeated team and player names compresses well
+RESPONSE_GZIP_MIN_SIZE = 512
+RESPONSE_GZIP_LEVEL = 6
+
+# LRU cache of (expires_at, body, etag, gzipped_body or None) keyed by request
+# path and query string.
+# The generation counter stops a read that raced with a write from storing the
+# pre-write data after the cache has been invalidated.
+_response_cache = OrderedDict()
+_response_cache_lock = threading.Lock()
+_response_cache_generation = 0
+
+def invalidate_response_cache():
+    """Drop every cached GET response (call after any team or bracket write)"""
+    global _response_cache_generation
+    with _response_cache_lock:
+        _response_cache.clear()
+        _response_cache_generation += 1
+
+def _cache_entry(body, now):
+    """Build a response cache entry, compressing the body once if it is big enough"""
+    gzipped = None
+    if len(body) >= RESPONSE_GZIP_MIN_SIZE:
+        gzipped = gzip.compress(body, compresslevel=RESPONSE_GZIP_LEVEL, mtime=0)
+    return (now + RESPONSE_CACHE_TTL, body, generate_etag(body), gzipped)
+
+def _store_cached_response(key, generation, entry):
+    """Cache entry unless a write invalidated the cache since the read began"""
+    with _response_cache_lock:
+        if generation == _response_cache_generation:
+            _response_cache[key] = entry
+            _response_cache.move_to_end(key)
+            if len(_response_cache) > RESPONSE_CACHE_SIZE:
+                _response_cache.popitem(last=False)
+
+def _stream_into_cache(chunks, key, generation, now):
+    """Pass a streamed body through, caching it if it completes"""
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    _store_cached_response(key, generation, _cache_entry(b''.join(parts), now))
+
+def cached_response(view):
+    """Serve a read-only JSON view from the response cache, with ETag revalidation"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.full_path
+        now = time.monotonic()
+        with _response_cache_lock:
+            entry = _response_cache.get(key)
+            if entry is not None and entry[0] > now:
+                _response_cache.move_to_end(key)
+            else:
+                entry = None
+            generation = _response_cache_generation
+        
+        if entry is None:
+            response = app.make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            if response.is_streamed:
+                # Send the body as it is produced and cache it once complete
+                response.response = _stream_into_cache(response.response, key, generation, now)
+                response.cache_control.no_cache = True
+                return response
+            entry = _cache_entry(response.get_data(), now)
+            _store_cached_response(key, generation, entry)
+        
+        _, body, etag, gzipped = entry
+        if gzipped is not None and request.accept_encodings.quality('gzip') > 0:
+            response = Response(gzipped, mimetype='application/json')
+            response.content_encoding = 'gzip'
+            # Each encoding is a different representation, so it needs its own tag
+            response.set_etag(etag + '-gzip')
+        else:
+            response = Response(body, mimetype='application/json')
+            response.set_etag(etag)
+        response.vary.add('Accept-Encoding')
+        # Let browsers keep the body but revalidate every time, so polling
+        # clients get empty 304 responses while the data is unchanged
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+    return wrapper
+
+# Read-only stats a CDN in front of the API may keep for a short while. The
+# directives go in CDN-Cache-Control (RFC 9213), which browsers ignore, so
+# browsers keep revalidating and see a saved result straight away
+SHARED_CACHE_ENDPOINTS = frozenset(('get_goal_scorers', 'get_match_history', 'get_team_analytics'))
+SHARED_CACHE_CONTROL = 'public, max-age=30, stale-while-revalidate=300'
+
+@app.after_request
+def allow_shared_caching(response):
+    if request.endpoint in SHARED_CACHE_ENDPOINTS and response.status_code in (200, 304):
+        response.headers['CDN-Cache-Control'] = SHARED_CACHE_CONTROL
+    return response
 
 # ============================================================================
 # EMAIL CONFIGURATION
@@ -124,87 +483,381 @@ EMAIL_PORT_ALT = 587
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', '')
 gemini_model = None  # Will hold the initialized Gemini model
 
-# Initialize Gemini AI if API key is provided
-if GEMINI_API_KEY:
-    try:
-        # Configure Gemini with API key
-        genai.configure(api_key=GEMINI_API_KEY)
-        
-        # List available models to find the best one for our use case
-        print("🤖 Checking available Gemini models...")
-        available_models = genai.list_models()
-        
-        # Try to find a suitable model that supports content generation
-        model_found = False
-        for model in available_models:
-            # Check if model supports content generation (required for commentary)
-            if 'generateContent' in model.supported_generation_methods:
-                print(f"🔍 Found model: {model.name} - {model.display_name}")
-                
-                # Prefer Gemini models for best performance
-                if 'gemini' in model.name.lower():
-                    gemini_model = genai.GenerativeModel(model.name)
-                    print(f"🟢 Using model: {model.name}")
-                    model_found = True
-                    break
-        
-        if not model_found:
-            # Fallback: try common model names
+# Gemini model used for commentary (override with GEMINI_MODEL). If the
+# default model turns out not to exist, the first available Gemini model that
+# supports content generation is used instead
+GEMINI_MODEL_NAME = os.getenv('GEMINI_MODEL', '')
+GEMINI_DEFAULT_MODEL = 'gemini-2.5-flash'
+
+# Fixed commentator instructions, sent as the model's system instruction so the
+# per-call prompt only carries the match-specific details
+MATCH_COMMENTARY_INSTRUCTIONS = """
+You are a professional football commentator for the African Nations League tournament.
+Generate exciting, realistic match commentary for the match you are given.
+
+Please provide engaging, realistic football commentary that includes:
+1. Match introduction and atmosphere
+2. Commentary for each goal (if any)
+3. Key moments in the match
+4. Match conclusion and analysis
+
+Make it engaging, realistic, and exciting like a real football commentator would.
+Include specific details about the teams and make it sound natural and passionate.
+Format each commentary line on a new line.
+Keep it to 8-12 lines maximum.
+"""
+
+# Per-match details sent with MATCH_COMMENTARY_INSTRUCTIONS, filled with str.format
+MATCH_COMMENTARY_PROMPT = """Match: {team1} vs {team2}
+Final Score: {score1}-{score2}
+{goal_details}
+"""
+
+# Upper bound on lines kept from a full-match commentary (the instructions ask for 8-12)
+MAX_AI_COMMENTARY_LINES = 12
+
+commentary_model = None  # Gemini model primed with MATCH_COMMENTARY_INSTRUCTIONS
+
+# Maximum Gemini requests in flight per process. Commentary calls come from many
+# request threads at once (gthread workers), so cap them to stay inside the
+# provider's rate limits instead of failing with 429s
+GEMINI_MAX_CONCURRENT_REQUESTS = 8
+_gemini_semaphore = threading.BoundedSemaphore(GEMINI_MAX_CONCURRENT_REQUESTS)
+
+# Retries for Gemini calls rejected as rate limited (429) or unavailable (503).
+# The delay doubles on each attempt, plus random jitter so concurrent callers
+# do not retry in lockstep
+GEMINI_MAX_RETRIES = 3
+GEMINI_RETRY_BASE_DELAY = 0.5  # seconds
+
+# Circuit breaker: after this many consecutive failed Gemini calls, stop calling
+# Gemini (callers fall back to template commentary) for the cooldown period
+GEMINI_BREAKER_THRESHOLD = 5
+GEMINI_BREAKER_COOLDOWN = 60  # seconds
+
+_gemini_breaker_lock = threading.Lock()
+_gemini_consecutive_failures = 0
+_gemini_disabled_until = 0.0
+
+class GeminiUnavailableError(RuntimeError):
+    """Raised instead of calling Gemini while the circuit breaker is open"""
+
+_gemini_lock = threading.Lock()
+_gemini_initialized = False
+
+# Models replaced after Gemini reported them missing, mapped to their replacements
+_replaced_gemini_models = {}
+_gemini_models_listed = False
+
+def replacement_gemini_model(model):
+    """
+    The model to use instead of one Gemini says does not exist, or None.
+
+    Only the default model is replaced, and the model list is fetched at most
+    once per process, on the first request that hits the missing model.
+    """
+    global gemini_model, commentary_model, _gemini_models_listed
+    
+    if GEMINI_MODEL_NAME:
+        # Named explicitly; a missing model is a configuration error
+        return None
+    
+    with _gemini_lock:
+        if not _gemini_models_listed:
+            _gemini_models_listed = True
             try:
-                gemini_model = genai.GenerativeModel('gemini-pro')
-                print("🟢 Using gemini-pro model")
-            except:
-                try:
-                    gemini_model = genai.GenerativeModel('models/gemini-pro')
-                    print("🟢 Using models/gemini-pro model")
-                except:
-                    # Use the first available model that supports generateContent
-                    for model in available_models:
-                        if 'generateContent' in model.supported_generation_methods:
-                            gemini_model = genai.GenerativeModel(model.name)
-                            print(f"🟢 Fallback to model: {model.name}")
-                            break
+                model_name = next((m.name for m in genai.list_models()
+                                   if 'generateContent' in m.supported_generation_methods
+                                   and 'gemini' in m.name.lower()), None)
+            except Exception as e:
+                logger.warning("Could not list Gemini models: %s", e)
+                model_name = None
             
-    except Exception as e:
-        print(f"🔴 Gemini configuration error: {e}")
-        gemini_model = None
-else:
-    print("🔴 Gemini API key not found - using template commentary")
+            if model_name:
+                logger.warning("Model %s not found, using %s", GEMINI_DEFAULT_MODEL, model_name)
+                replaced = {gemini_model: genai.GenerativeModel(model_name),
+                            commentary_model: genai.GenerativeModel(
+                                model_name, system_instruction=MATCH_COMMENTARY_INSTRUCTIONS)}
+                _replaced_gemini_models.update(replaced)
+                gemini_model = replaced[gemini_model]
+                commentary_model = replaced[commentary_model]
+        
+        return _replaced_gemini_models.get(model)
 
-def send_email(to_email, subject, body):
-    """Send email notification"""
-    if not EMAIL_USER or not EMAIL_PASSWORD:
-        print("🔴 Email not configured - skipping email notification")
-        return False
+def init_gemini():
+    """Configure Gemini and pick a commentary model once per process"""
+    global gemini_model, commentary_model, _gemini_initialized
     
-    if not to_email or to_email == '':
-        print("🔴 No recipient email provided - skipping")
-        return False
-        
-    try:
-        msg = MIMEMultipart()
-        msg['From'] = EMAIL_USER
-        msg['To'] = to_email
-        msg['Subject'] = subject
-        
-        msg.attach(MIMEText(body, 'plain'))
+    if _gemini_initialized:
+        return gemini_model
+    
+    with _gemini_lock:
+        if _gemini_initialized:
+            return gemini_model
         
-        # Try Gmail first, then Outlook
+        # Initialize Gemini AI if API key is provided
+        if GEMINI_API_KEY:
+            try:
+                # Configure Gemini with API key
+                genai.configure(api_key=GEMINI_API_KEY)
+                
+                # Build the model directly from its name; listing every
+                # available model costs a network round trip on each boot
+                model_name = GEMINI_MODEL_NAME or GEMINI_DEFAULT_MODEL
+                gemini_model = genai.GenerativeModel(model_name)
+                logger.info("Using model: %s", model_name)
+                
+                commentary_model = genai.GenerativeModel(
+                    model_name, system_instruction=MATCH_COMMENTARY_INSTRUCTIONS
+                )
+                
+            except Exception:
+                logger.exception("Gemini configuration error")
+                gemini_model = None
+                commentary_model = None
+        else:
+            logger.warning("Gemini API key not found - using template commentary")
+                
+        _gemini_initialized = True
+    
+    return gemini_model
+
+def _record_gemini_result(succeeded):
+    """Track consecutive Gemini failures and open the circuit breaker when needed"""
+    global _gemini_consecutive_failures, _gemini_disabled_until
+    
+    with _gemini_breaker_lock:
+        if succeeded:
+            _gemini_consecutive_failures = 0
+            return
+        _gemini_consecutive_failures += 1
+        if _gemini_consecutive_failures >= GEMINI_BREAKER_THRESHOLD:
+            _gemini_consecutive_failures = 0
+            _gemini_disabled_until = time.monotonic() + GEMINI_BREAKER_COOLDOWN
+            logger.warning("Gemini failed %d times in a row, pausing AI commentary for %ds",
+                           GEMINI_BREAKER_THRESHOLD, GEMINI_BREAKER_COOLDOWN)
+
+def _call_gemini(model, prompt, **kwargs):
+    """
+    Call the model, backing off and retrying when Gemini is rate limiting us.
+
+    With stream=True the call only starts the response; the caller records the
+    result with _record_gemini_result once the stream has been read.
+    """
+    if time.monotonic() < _gemini_disabled_until:
+        raise GeminiUnavailableError("Gemini temporarily disabled after repeated failures")
+    
+    for attempt in range(GEMINI_MAX_RETRIES + 1):
+        try:
+            response = model.generate_content(prompt, **kwargs)
+        except NotFound:
+            # The default model may have been retired; retry on one that exists
+            replacement = replacement_gemini_model(model)
+            if replacement is None or attempt == GEMINI_MAX_RETRIES:
+                _record_gemini_result(False)
+                raise
+            model = replacement
+        except (ResourceExhausted, ServiceUnavailable) as e:
+            if attempt == GEMINI_MAX_RETRIES:
+                _record_gemini_result(False)
+                raise
+            delay = GEMINI_RETRY_BASE_DELAY * 2 ** attempt
+            logger.warning("Gemini call failed (%s), retrying in %.1fs", e, delay)
+            time.sleep(delay + random.uniform(0, delay))
+        except Exception:
+            _record_gemini_result(False)
+            raise
+        else:
+            if not kwargs.get('stream'):
+                _record_gemini_result(True)
+            return response
+
+def generate_content(model, prompt, **kwargs):
+    """Call Gemini, waiting for a free slot if too many calls are in flight"""
+    with _gemini_semaphore:
+        return _call_gemini(model, prompt, **kwargs)
+
+def stream_content_lines(model, prompt):
+    """
+    Stream a Gemini response and yield each complete, non-empty line as soon as
+    it arrives, instead of waiting for the whole response. Callers can stop
+    iterating early to end the generation.
+    """
+    with _gemini_semaphore:
+        pending = ''
+        response = _call_gemini(model, prompt, stream=True)
+        try:
+            for chunk in response:
+                pending += chunk.text
+                *lines, pending = pending.split('\n')
+                for line in lines:
+                    if line.strip():
+                        yield line.strip()
+        except Exception:
+            # Errors partway through the stream count towards the circuit breaker too
+            _record_gemini_result(False)
+            raise
+        _record_gemini_result(True)
+        if pending.strip():
+            yield pending.strip()
+
+@app.before_request
+def ensure_clients_initialized():
+    """Make sure Firebase and Gemini are ready before handling a request"""
+    init_firebase()
+    init_gemini()
+
+# Number of messages sent over one SMTP session before it is recycled
+SMTP_MAX_MESSAGES_PER_CONNECTION = 100
+
+# Maximum number of idle SMTP sessions kept open between emails
+SMTP_POOL_SIZE = 5
+
+# Seconds to wait on the SMTP server before giving up on a connect or command
+SMTP_TIMEOUT = 10
+
+class SMTPPool:
+    """
+    Bounded pool of authenticated SMTP sessions shared by every thread, so the
+    TCP connect, STARTTLS handshake and AUTH are paid once per session instead
+    of once per email.
+    """
+    
+    def __init__(self, size):
+        # LIFO so the most recently used (least likely to be dropped) session is reused first
+        self._idle = queue.LifoQueue(maxsize=size)
+    
+    @staticmethod
+    def _open():
+        """Open and authenticate a new SMTP session"""
         email_host = os.getenv('EMAIL_HOST', EMAIL_HOST)
         email_port = int(os.getenv('EMAIL_PORT', EMAIL_PORT))
         
-        server = smtplib.SMTP(email_host, email_port)
-        server.starttls()
-        server.login(EMAIL_USER, EMAIL_PASSWORD)
-        text = msg.as_string()
-        server.sendmail(EMAIL_USER, to_email, text)
-        server.quit()
-        print(f"🟢 Email sent successfully to {to_email}")
-        return True
+        # Port 465 speaks TLS from the first byte, which saves the STARTTLS round trip
+        if email_port == 465:
+            server = smtplib.SMTP_SSL(email_host, email_port, timeout=SMTP_TIMEOUT)
+        else:
+            server = smtplib.SMTP(email_host, email_port, timeout=SMTP_TIMEOUT)
+        
+        try:
+            if email_port != 465:
+                server.starttls()
+            server.login(EMAIL_USER, EMAIL_PASSWORD)
+        except BaseException:
+            # Don't leak the socket when the handshake or login fails
+            server.close()
+            raise
+        
+        server.messages_sent = 0
+        return server
+    
+    @staticmethod
+    def _close(server):
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+    
+    def _get(self):
+        """Return a healthy idle session, or open a new one"""
+        while True:
+            try:
+                server = self._idle.get_nowait()
+            except queue.Empty:
+                return self._open()
+            
+            if server.messages_sent >= SMTP_MAX_MESSAGES_PER_CONNECTION:
+                # Recycle long-lived sessions to stay under provider limits
+                self._close(server)
+                continue
+            
+            # NOOP health check - the server may have dropped an idle session
+            try:
+                if server.noop()[0] == 250:
+                    return server
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._close(server)
+    
+    @contextmanager
+    def acquire(self):
+        """Borrow a session; it goes back to the pool unless sending failed"""
+        server = self._get()
+        try:
+            yield server
+        except BaseException:
+            self._close(server)
+            raise
+        try:
+            self._idle.put_nowait(server)
+        except queue.Full:
+            self._close(server)
+    
+    def close_all(self):
+        """Close every idle session"""
+        while True:
+            try:
+                self._close(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+smtp_pool = SMTPPool(SMTP_POOL_SIZE)
+atexit.register(smtp_pool.close_all)
+
+# Background workers for notification emails sent off the request path
+EMAIL_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix='mail')
+atexit.register(EMAIL_EXECUTOR.shutdown)
+
+def _build_email(to_email, subject, body):
+    """Render a plain-text notification email"""
+    msg = MIMEMultipart()
+    msg['From'] = EMAIL_USER
+    msg['To'] = to_email
+    msg['Subject'] = subject
+    
+    msg.attach(MIMEText(body, 'plain'))
+    return msg.as_string()
+
+def send_emails_bulk(messages):
+    """
+    Send several (to_email, subject, body) emails over a single pooled SMTP
+    session, so the health check and any reconnect are paid once for the whole
+    batch. Returns the number of emails sent.
+    """
+    if not EMAIL_USER or not EMAIL_PASSWORD:
+        logger.debug("Email not configured - skipping email notification")
+        return 0
+    
+    sent = 0
+    
+    try:
+        pending = [(to_email, _build_email(to_email, subject, body))
+                   for to_email, subject, body in messages if to_email]
+        position = 0
+        for attempt in range(2):
+            try:
+                with smtp_pool.acquire() as server:
+                    while position < len(pending):
+                        to_email, text = pending[position]
+                        try:
+                            server.sendmail(EMAIL_USER, to_email, text)
+                        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as e:
+                            # Only this message was rejected - keep the session for the rest
+                            logger.error("Email to %s was rejected: %s", to_email, e)
+                        else:
+                            server.messages_sent += 1
+                            sent += 1
+                            logger.info("Email sent to %s", to_email)
+                        position += 1
+                break
+            except smtplib.SMTPServerDisconnected:
+                # Session dropped mid-batch - reconnect once and send the rest
+                if attempt:
+                    raise
     except Exception as e:
-        print(f"🔴 Email sending error: {e}")
-        print(f"🔴 Check your EMAIL_USER and EMAIL_PASSWORD in .env file")
-        return False
+        logger.error("Email sending error: %s - check EMAIL_USER and EMAIL_PASSWORD in .env file", e)
+    
+    return sent
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -237,153 +890,234 @@ Best regards,
 African Nations League System
         """
         
-        success = send_email(test_email_address, subject, body)
+        sent = send_emails_bulk([(test_email_address, subject, body)])
         
-        if success:
+        if sent == 1:
             return jsonify({'message': 'Test email sent successfully!'}), 200
         else:
             return jsonify({'error': 'Failed to send test email'}), 500
             
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
+
+# Live match commentary lines, parsed once at import and filled per event with
+# str.format_map / str.format
+COMMENTARY_TEMPLATES = {
+    'pre_match': "Welcome to this exciting African Nations League match between {team1} and {team2}! Both teams are ready for kickoff in what promises to be a thrilling encounter.",
+    'kickoff': "The referee blows the whistle and we're underway! {team1} kicks off against {team2}.",
+    'goal_team1': "GOAL! {scorer} finds the back of the net for {team1} in the {minute}th minute! What a brilliant strike! The score is now {team1} {score1} - {score2} {team2}.",
+    'goal_team2': "GOAL! {scorer} scores for {team2} in the {minute}th minute! Brilliant finish! The score is now {team1} {score1} - {score2} {team2}.",
+    'halftime': "Half-time here and it's {team1} {score1} - {score2} {team2}. What a first half we've witnessed! Both teams will be looking to make their mark in the second period.",
+    'second_half': "We're back underway for the second half! {team2} gets us started again. Can they find the breakthrough in this second period?",
+    'fulltime_win': "Full-time! {team1} {score1} - {score2} {team2}. What a match! {winner} takes the victory in this thrilling encounter.",
+    'fulltime_draw': "Full-time and it's all square! {team1} {score1} - {score2} {team2}. We're heading to extra time!",
+    'extra_time': "Extra time begins! Both teams have 30 more minutes to find a winner.",
+    'extra_time_goal': "GOAL in extra time! {scorer} scores for {team}! The score is now {score1}-{score2}!",
+    'penalties_start': "Extra time ends {score1}-{score2}. We're going to penalties!",
+}
+
+# Server-sent event frames for the live match stream, built as bytes so Werkzeug
+# writes them straight to the socket without re-encoding each chunk
+_TIME_UPDATE_FRAME = b'data: {"type":"time_update","minute":%d}\n\n'
+
+def _sse(event):
+    """Encode an event dict as a server-sent event frame"""
+    return b"data: " + orjson.dumps(event) + b"\n\n"
+
+_JSON_BOOL = {True: b'true', False: b'false'}
+
+def _penalty_frame_template(country, sudden_death=False):
+    """
+    A penalty event frame for one team with only the kick result and the
+    running shootout score left to fill in (as %s, %d, %d)
+    """
+    team = orjson.dumps(country).replace(b'%', b'%%')
+    tail = b',"sudden_death":true}' if sudden_death else b'}'
+    return b'data: {"type":"penalty","team":' + team + b',"scored":%s,"penalties":{"team1":%d,"team2":%d}' + tail + b'\n\n'
+
+# Filler commentary for quiet minutes in the live stream; {team} is filled with
+# a randomly picked side
+MATCH_SITUATIONS = (
+    "Good attacking play from {team}",
+    "Solid defensive work there from both teams",
+    "The midfield battle is heating up between {team1} and {team2}",
+    "Corner kick awarded to {team}",
+    "Both teams are looking for that crucial breakthrough",
+    "Fast-paced action in the middle of the park",
+    "Shot goes wide of the target - close but not close enough",
+    "Great save by the goalkeeper! What a reflex stop",
+    "The crowd is getting behind their team here",
+)
+
+# Pause before each simulated minute and each penalty kick in the live stream
+# (0.2 seconds per minute keeps a full match well inside the worker timeout)
+LIVE_MINUTE_SECONDS = 0.2
+LIVE_PENALTY_SECONDS = 0.5
+
+# Set when the worker is shutting down: live streams stop pacing and play out
+# the rest of the match at once instead of being cut off mid-match
+_live_streams_stopping = threading.Event()
+
+def stop_live_streams():
+    """Fast-forward every running live stream to the final whistle"""
+    _live_streams_stopping.set()
+
+def goal_minutes(first, last, chance, rand):
+    """
+    Yield the minutes from first to last in which a goal is scored, when every
+    minute independently has the given chance of a goal. Instead of rolling
+    for each minute, the gap to the next goal is drawn from the matching
+    geometric distribution, so a match costs one draw per goal (plus one).
+    """
+    log_miss = math.log1p(-chance)
+    minute = first - 1
+    while True:
+        # 1 - rand() is in (0, 1], so the log is always defined
+        minute += 1 + int(math.log(1.0 - rand()) / log_miss)
+        if minute > last:
+            return
+        yield minute
+
+# Dedicated random generator for match simulation, bound to local names inside
+# the simulation loops to skip the module/global lookups on every draw
+SIM_RNG = random.Random()
+
+# Match simulation odds. Simulated matches (simulate/play) roll a goal for
+# either side each minute; live matches roll per team, scaled by rating
+GOAL_CHANCE_PER_MINUTE = 0.015
+EXTRA_TIME_GOAL_CHANCE_PER_MINUTE = 0.02
+LIVE_GOAL_CHANCE_PER_MINUTE = 0.035
+LIVE_EXTRA_TIME_GOAL_CHANCE_PER_MINUTE = 0.04
+PENALTY_SCORE_CHANCE = 0.75
+
+# Positions every player is rated in
+PLAYER_POSITIONS = ('GK', 'DF', 'MD', 'AT')
+
+# Positions whose players are credited with goals
+ATTACKING_POSITIONS = frozenset(('AT', 'MD'))
+
+def goal_scorer_candidates(team):
+    """Names of the attackers and midfielders in a squad, or the whole squad if it has none"""
+    players = team['players']
+    attackers = [p['name'] for p in players if p.get('naturalPosition') in ATTACKING_POSITIONS]
+    return attackers or [p['name'] for p in players]
 
 def generate_player_ratings(natural_position):
     """Generate player ratings based on natural position"""
-    ratings = {}
-    positions = ['GK', 'DF', 'MD', 'AT']
-    
-    for pos in positions:
-        if pos == natural_position:
-            ratings[pos] = random.randint(50, 100)
-        else:
-            ratings[pos] = random.randint(0, 50)
-    
-    return ratings
+    rand = SIM_RNG.random
+    # 50-100 in the natural position, 0-50 elsewhere (uniform integers, like randint)
+    return {
+        pos: 50 + int(rand() * 51) if pos == natural_position else int(rand() * 51)
+        for pos in PLAYER_POSITIONS
+    }
 
 def calculate_team_rating(players):
     """Calculate team rating from player ratings"""
     if not players:
         return 0
     
-    total_rating = 0
-    for player in players:
-        # Use the player's natural position rating for team calculation
-        natural_pos = player.get('naturalPosition', 'MD')
-        total_rating += player.get('ratings', {}).get(natural_pos, 50)
-    
+    # Use each player's natural position rating for the team calculation
+    total_rating = sum(
+        player.get('ratings', {}).get(player.get('naturalPosition', 'MD'), 50)
+        for player in players
+    )
     return total_rating / len(players)
 
 def generate_ai_commentary(team1, team2, score1, score2, goal_scorers):
     """Generate AI commentary for match using Google Gemini"""
-    print(f"🎯 STARTING AI COMMENTARY for {team1['country']} vs {team2['country']}")
-    print(f"🎯 Score: {score1}-{score2}, Goals: {len(goal_scorers)}")
+    logger.debug("Generating commentary for %s %d-%d %s (%d goals)",
+                 team1['country'], score1, score2, team2['country'], len(goal_scorers))
     
     # If Gemini is not configured, fall back to template-based commentary
-    if not gemini_model:
-        print("🔴 GEMINI NOT CONFIGURED - Using template commentary")
+    if not commentary_model:
+        logger.debug("Gemini not configured - using template commentary")
         return generate_template_commentary(team1, team2, score1, score2, goal_scorers)
     
-    print("🟢 GEMINI CONFIGURED - Generating AI commentary...")
-    
     try:
         # Create detailed prompt for Gemini
-        goal_details = ""
         if goal_scorers:
-            goal_details = "\nGoal Scorers:\n"
-            for goal in goal_scorers:
-                goal_details += f"- {goal['scorer']} ({goal['team']}) at {goal['minute']} minutes\n"
+            goal_details = "Goal Scorers:\n" + "\n".join(
+                f"- {goal['scorer']} ({goal['team']}) at {goal['minute']} minutes" for goal in goal_scorers
+            )
         else:
-            goal_details = "\nNo goals were scored in this match.\n"
-        
-        prompt = f"""
-        You are a professional football commentator for the African Nations League tournament. 
-        Generate exciting, realistic match commentary for the following match:
-        
-        Match: {team1['country']} vs {team2['country']}
-        Final Score: {score1}-{score2}
-        {goal_details}
-        
-        Please provide engaging, realistic football commentary that includes:
-        1. Match introduction and atmosphere
-        2. Commentary for each goal (if any)
-        3. Key moments in the match
-        4. Match conclusion and analysis
-        
-        Make it engaging, realistic, and exciting like a real football commentator would. 
-        Include specific details about the teams and make it sound natural and passionate.
-        Format each commentary line on a new line.
-        Keep it to 8-12 lines maximum.
-        """
-        
-        print("🟢 Sending request to Gemini API...")
-        # Generate commentary using Gemini
-        response = gemini_model.generate_content(prompt)
-        commentary_text = response.text.strip()
+            goal_details = "No goals were scored in this match."
         
-        print(f"🟢 GEMINI RESPONSE: {commentary_text}")
+        prompt = MATCH_COMMENTARY_PROMPT.format(
+            team1=team1['country'], team2=team2['country'],
+            score1=score1, score2=score2, goal_details=goal_details
+        )
         
-        # Split into individual commentary lines
-        commentary_lines = [line.strip() for line in commentary_text.split('\n') if line.strip()]
+        # Stream commentary from Gemini (instructions live on the model) and
+        # stop reading once we have as many lines as the prompt asks for
+        commentary_lines = []
+        for line in stream_content_lines(commentary_model, prompt):
+            commentary_lines.append(line)
+            if len(commentary_lines) >= MAX_AI_COMMENTARY_LINES:
+                break
         
         # Ensure we have at least basic commentary
         if not commentary_lines:
-            print("🔴 EMPTY COMMENTARY FROM GEMINI - Using template")
+            logger.warning("Empty commentary from Gemini - using template")
             return generate_template_commentary(team1, team2, score1, score2, goal_scorers)
         
-        print(f"🟢 SUCCESS: Generated {len(commentary_lines)} AI commentary lines")
+        logger.debug("Generated %d AI commentary lines", len(commentary_lines))
         return commentary_lines
         
     except Exception as e:
-        print(f"🔴 GEMINI API ERROR: {e}")
+        logger.error("Gemini API error: %s", e)
         # Fall back to template commentary if Gemini fails
         return generate_template_commentary(team1, team2, score1, score2, goal_scorers)
 
-def generate_single_ai_commentary(text_prompt):
-    """Generate single line AI commentary for live streaming"""
+# Background workers for live commentary, so Gemini latency overlaps the
+# simulated minutes instead of stalling the match stream
+COMMENTARY_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix='commentary')
+atexit.register(COMMENTARY_POOL.shutdown, cancel_futures=True)
+
+# Seconds the live stream waits for outstanding AI commentary before full time
+AI_COMMENTARY_FINAL_WAIT = 3
+
+# Asks for a reaction to every goal of a match at once, filled with str.format
+GOAL_COMMENTARY_PROMPT = """
+You are a professional football commentator covering {team1} vs {team2} in the African Nations League.
+For each goal below, write ONE exciting sentence of live commentary reacting to it.
+Use only the exact team and player names given. No options, no formatting.
+Return a JSON array of strings with exactly one sentence per goal, in the same order.
+
+{goals}
+"""
+
+# Structured output so the reply parses straight into one line per goal
+GOAL_COMMENTARY_CONFIG = genai.GenerationConfig(response_mime_type='application/json', response_schema=list[str])
+
+def generate_goal_commentary_batch(team1, team2, goals):
+    """
+    Generate an AI reaction for every goal of a match with a single Gemini
+    request. goals are the live stream's goal events; returns one line (or
+    None where Gemini gave nothing usable) per goal, in order.
+    """
+    lines = [None] * len(goals)
+    if not gemini_model:
+        return lines
+    
+    goal_list = "\n".join(
+        f"{index}. {goal['scorer']} scores for {goal['team']} in the {goal['minute']}th minute, "
+        f"making it {team1['country']} {goal['score']['team1']} - {goal['score']['team2']} {team2['country']}"
+        for index, goal in enumerate(goals, 1)
+    )
+    prompt = GOAL_COMMENTARY_PROMPT.format(team1=team1['country'], team2=team2['country'], goals=goal_list)
+    
     try:
-        if not gemini_model:
-            return text_prompt  # Fallback to original text
-        
-        prompt = f"""
-        You are a professional football commentator. Based on this situation, write ONE single sentence of commentary:
-        
-        {text_prompt}
-        
-        STRICT RULES:
-        - Write ONLY ONE sentence
-        - Use ONLY the exact team names given (NO nicknames)
-        - NO options, NO alternatives, NO choices
-        - NO asterisks, NO formatting, NO bullet points
-        - Just plain commentary text
-        
-        Example: "What a brilliant pass from the midfielder, splitting the defense wide open!"
-        """
-        
-        response = gemini_model.generate_content(prompt)
-        if response and response.text:
-            commentary = response.text.strip()
-            # Remove any option markers or formatting
-            commentary = commentary.replace('**', '').replace('*', '').replace('Option', '').replace('option', '')
-            # Remove anything that looks like multiple choices
-            if 'Of course' in commentary or 'here are' in commentary.lower():
-                # If AI is giving options, just use the fallback
-                return text_prompt
-            # Take only the first sentence
-            if '.' in commentary:
-                commentary = commentary.split('.')[0] + '.'
-            # Take only the first line if multiple are generated
-            commentary = commentary.split('\n')[0]
-            return commentary
-        else:
-            return text_prompt
-            
+        response = generate_content(gemini_model, prompt, generation_config=GOAL_COMMENTARY_CONFIG)
+        for index, line in enumerate(orjson.loads(response.text)[:len(goals)]):
+            if isinstance(line, str) and line.strip():
+                lines[index] = line.replace('*', '').strip()
     except Exception as e:
-        print(f"Error generating single AI commentary: {e}")
-        return text_prompt
+        logger.error("Error generating goal commentary: %s", e)
+    
+    return lines
 
 def generate_template_commentary(team1, team2, score1, score2, goal_scorers):
     """Fallback template-based commentary"""
-    print("USING TEMPLATE COMMENTARY")
     commentary = []
     
     # Match start
@@ -460,34 +1194,51 @@ def register_team():
         }
         
         if db:
-            doc_ref = db.collection('teams').add(team_data)
+            doc_ref = TEAMS_COL.add(team_data)
             team_data['id'] = doc_ref[1].id
+            invalidate_response_cache()
         
         return jsonify({'message': 'Team registered successfully', 'team': team_data}), 201
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
 
 @app.route('/api/teams', methods=['GET'])
+@cached_response
 def get_teams():
-    """Get all registered teams"""
+    """
+    Get all registered teams. An optional comma-separated ?fields= list (e.g.
+    fields=country,rating,status) returns only those fields, which skips
+    downloading each team's 23-player squad.
+    """
     try:
         if not db:
             return jsonify({'teams': []}), 200
         
-        teams = []
-        docs = db.collection('teams').stream()
-        for doc in docs:
-            team_data = doc.to_dict()
-            team_data['id'] = doc.id
-            teams.append(team_data)
+        fields = [field for field in request.args.get('fields', '').split(',') if field]
+        query = TEAMS_COL.select(fields) if fields else TEAMS_COL
+        
+        # Pull the first team before streaming so query errors still get a 500
+        docs = iter(query.stream())
+        first_doc = next(docs, None)
+        
+        def generate_teams():
+            """Stream {"teams": [...]} one team at a time as Firestore returns them"""
+            yield b'{"teams":['
+            if first_doc is not None:
+                for index, doc in enumerate(itertools.chain((first_doc,), docs)):
+                    team_data = doc.to_dict()
+                    team_data['id'] = doc.id
+                    yield (b',' if index else b'') + app.json.dumpb(team_data)
+            yield b']}'
         
-        return jsonify({'teams': teams}), 200
+        return Response(generate_teams(), mimetype='application/json')
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
 
 @app.route('/api/tournament/bracket', methods=['GET'])
+@cached_response
 def get_tournament_bracket():
     """Get tournament bracket"""
     try:
@@ -495,14 +1246,111 @@ def get_tournament_bracket():
             return jsonify({'bracket': None}), 200
         
         # Get tournament data
-        tournament_doc = db.collection('tournament').document('current').get()
-        if tournament_doc.exists:
-            return jsonify({'bracket': tournament_doc.to_dict()}), 200
-        else:
-            return jsonify({'bracket': None}), 200
+        return jsonify({'bracket': get_current_tournament()}), 200
             
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
+
+def empty_match(team1=None, team2=None):
+    """A bracket slot for a match that has not been played yet"""
+    return {'team1': team1, 'team2': team2, 'winner': None, 'score': None, 'goal_scorers': [], 'commentary': []}
+
+def match_index(bracket):
+    """Map (round, frozenset of both team ids) to each scheduled match slot in the bracket"""
+    slots = [('quarterFinal', match) for match in bracket.get('quarterFinals', [])]
+    slots += [('semiFinal', match) for match in bracket.get('semiFinals', [])]
+    slots.append(('final', bracket.get('final')))
+    
+    index = {}
+    for match_type, match in slots:
+        if not match:
+            continue
+        team1_id = (match.get('team1') or {}).get('id')
+        team2_id = (match.get('team2') or {}).get('id')
+        if team1_id and team2_id:
+            index[match_type, frozenset((team1_id, team2_id))] = match
+    return index
+
+def advanced_match(team1, team2, previous):
+    """A later-round slot for two winners, keeping any result it already has"""
+    previous = previous or {}
+    return {
+        'team1': team1,
+        'team2': team2,
+        'winner': previous.get('winner'),
+        'score': previous.get('score'),
+        'goal_scorers': previous.get('goal_scorers', []),
+        'commentary': previous.get('commentary', []),
+        'team1_goals': previous.get('team1_goals'),
+        'team2_goals': previous.get('team2_goals'),
+        'play_by_play': previous.get('play_by_play', False)
+    }
+
+def apply_match_result(bracket, match_type, team1_id, team2_id, result):
+    """
+    Record a finished match in the bracket and advance its winner.
+
+    result holds the fields to set on the match slot (winner, score, goals,
+    goal_scorers, commentary, play_by_play). Returns True if the match was
+    found in the bracket.
+    """
+    match = match_index(bracket).get((match_type, frozenset((team1_id, team2_id))))
+    if match is None:
+        return False
+    match.update(result)
+    
+    if match_type == 'quarterFinal':
+        # Auto-advance to semi-finals when each side's two quarter finals finish:
+        # QF 0 vs QF 1 on the left, QF 2 vs QF 3 on the right
+        qfs = bracket['quarterFinals']
+        semis = bracket.setdefault('semiFinals', [{}, {}])
+        while len(semis) < 2:
+            semis.append({})
+        for side in (0, 1):
+            first, second = 2 * side, 2 * side + 1
+            if len(qfs) > second and qfs[first].get('winner') and qfs[second].get('winner'):
+                semis[side] = advanced_match(qfs[first]['winner'], qfs[second]['winner'], semis[side])
+    
+    elif match_type == 'semiFinal':
+        # Auto-advance to final if both semi finals are complete
+        semis = bracket['semiFinals']
+        if all(m.get('winner') for m in semis) and not (bracket.get('final') or {}).get('team1'):
+            winners = [m['winner'] for m in semis if m.get('winner')]
+            if len(winners) >= 2:
+                bracket['final'] = empty_match(winners[0], winners[1])
+    
+    else:
+        bracket['status'] = 'completed'
+    
+    return True
+
+@firestore.transactional
+def _record_match_result(transaction, match_type, team1_id, team2_id, result):
+    tournament_doc = TOURNAMENT_DOC.get(transaction=transaction)
+    if not tournament_doc.exists:
+        return None, False
+    bracket = tournament_doc.to_dict()
+    if not apply_match_result(bracket, match_type, team1_id, team2_id, result):
+        return bracket, False
+    transaction.update(TOURNAMENT_DOC, bracket_round_fields(bracket, match_type))
+    return bracket, True
+
+def record_match_result(match_type, team1_id, team2_id, result):
+    """
+    Apply a match result to the stored bracket and save the fields it changed.
+
+    The read and the write run in one Firestore transaction, so a save that
+    races another one (from any instance) is retried on the fresh bracket
+    rather than overwriting that save's round.
+
+    Returns (bracket, updated): bracket is None when there is no tournament,
+    and updated is False when the match is not in the bracket.
+    """
+    bracket, updated = _record_match_result(db.transaction(), match_type, team1_id, team2_id, result)
+    if updated:
+        invalidate_tournament_cache()
+        invalidate_response_cache()
+    return bracket, updated
 
 @app.route('/api/tournament/start', methods=['POST'])
 def start_tournament():
@@ -512,59 +1360,45 @@ def start_tournament():
             return jsonify({'error': 'Database not available'}), 500
         
         # Check if we have 8 teams
-        teams_docs = db.collection('teams').stream()
-        teams = list(teams_docs)
-        
+        teams = list(TEAMS_COL.stream())
         if len(teams) < 8:
             return jsonify({'error': f'Need exactly 8 teams to start tournament, currently have {len(teams)}'}), 400
         
-        # Create tournament bracket
+        # Draw 8 teams in random order for the bracket; only the drawn
+        # documents are converted to dicts
         teams_data = []
-        for team_doc in teams:
+        for team_doc in SIM_RNG.sample(teams, 8):
             team_data = team_doc.to_dict()
             team_data['id'] = team_doc.id
             teams_data.append(team_data)
         
-        # Shuffle teams for random bracket
-        random.shuffle(teams_data)
-        
+        # Consecutive drawn teams meet in the quarter-finals
         bracket = {
-            'quarterFinals': [
-                {'team1': teams_data[0], 'team2': teams_data[1], 'winner': None, 'score': None, 'goal_scorers': [], 'commentary': []},
-                {'team1': teams_data[2], 'team2': teams_data[3], 'winner': None, 'score': None, 'goal_scorers': [], 'commentary': []},
-                {'team1': teams_data[4], 'team2': teams_data[5], 'winner': None, 'score': None, 'goal_scorers': [], 'commentary': []},
-                {'team1': teams_data[6], 'team2': teams_data[7], 'winner': None, 'score': None, 'goal_scorers': [], 'commentary': []}
-            ],
-            'semiFinals': [
-                {'team1': None, 'team2': None, 'winner': None, 'score': None, 'goal_scorers': [], 'commentary': []},
-                {'team1': None, 'team2': None, 'winner': None, 'score': None, 'goal_scorers': [], 'commentary': []}
-            ],
-            'final': {
-                'team1': None, 'team2': None, 'winner': None, 'score': None, 'goal_scorers': [], 'commentary': []
-            },
+            'quarterFinals': [empty_match(teams_data[i], teams_data[i + 1]) for i in range(0, 8, 2)],
+            'semiFinals': [empty_match(), empty_match()],
+            'final': empty_match(),
             'status': 'active',
             'startedAt': datetime.now().isoformat()
         }
         
         # Save tournament to database
-        db.collection('tournament').document('current').set(bracket)
+        _set_with_retry(TOURNAMENT_DOC, bracket)
+        invalidate_tournament_cache()
+        invalidate_response_cache()
         
         return jsonify({'message': 'Tournament started successfully', 'bracket': bracket}), 200
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
 
 @app.route('/api/matches/play', methods=['POST'])
 def play_match():
     """Play a match with full AI commentary (play-by-play)"""
-    print("🎮 PLAY MATCH ENDPOINT CALLED - WITH COMMENTARY")
     return simulate_match_internal(play_by_play=True)
 
 @app.route('/api/matches/live-stream', methods=['POST'])
 def live_stream_match():
     """Stream a live match with real-time AI commentary"""
-    print("LIVE STREAM MATCH ENDPOINT CALLED")
-    
     try:
         # Get request data first, before creating the generator
         data = request.json
@@ -579,207 +1413,196 @@ def live_stream_match():
             return jsonify({'error': 'Database not available'}), 500
         
         # Get team data
-        team1_doc = db.collection('teams').document(team1_id).get()
-        team2_doc = db.collection('teams').document(team2_id).get()
+        team1, team2 = get_teams_by_id([team1_id, team2_id])
         
-        if not team1_doc.exists or not team2_doc.exists:
+        if team1 is None or team2 is None:
             return jsonify({'error': 'Teams not found'}), 404
         
-        team1 = team1_doc.to_dict()
-        team2 = team2_doc.to_dict()
-        team1['id'] = team1_id
-        team2['id'] = team2_id
-        
-        print(f"🏟️ Starting live stream: {team1['country']} vs {team2['country']}")
+        logger.info("Starting live stream: %s vs %s", team1['country'], team2['country'])
         
     except Exception as e:
-        print(f"Error setting up live stream: {e}")
-        return jsonify({'error': str(e)}), 500
+        logger.exception("Error setting up live stream")
+        return error_response(e)
     
-    def generate_live_match():
+    def simulate_live_match():
         """
-        Generate live match stream with smooth timer progression.
-        Uses template commentary for instant delivery without blocking.
-        AI commentary can be added as a post-processing enhancement.
+        Simulate the whole match without waiting. Yields the stream in order:
+        event dicts, prebuilt SSE byte frames (penalty kicks), and numbers giving the
+        pause in seconds before the next event is shown to the viewer.
         """
+        rand = SIM_RNG.random
+        choice = SIM_RNG.choice
+        
         try:
             # Send initial match info
-            yield f"data: {json.dumps({'type': 'match_start', 'team1': team1, 'team2': team2, 'minute': 0})}\n\n"
+            yield {'type': 'match_start', 'team1': team1, 'team2': team2, 'minute': 0}
             
             # Simulate match minute by minute
             team1_goals = 0
             team2_goals = 0
             goal_scorers = []
             
+            # Team names used to fill the commentary templates
+            match_info = {'team1': team1['country'], 'team2': team2['country']}
+            match_teams = (team1['country'], team2['country'])
+            
+            # Possible goal scorers, picked once rather than on every goal
+            team1_scorers = goal_scorer_candidates(team1)
+            team2_scorers = goal_scorer_candidates(team2)
+            
+            # Goal chances depend only on the team ratings, so work them out
+            # once instead of every simulated minute.
+            # Base chance per team per minute (~0.035 avg = ~3.15 goals/game total)
+            # Scaled by team rating so stronger teams score more often
+            team1_rating = team1.get('rating', 50)
+            team2_rating = team2.get('rating', 50)
+            total_rating = team1_rating + team2_rating
+            base_chance = LIVE_GOAL_CHANCE_PER_MINUTE
+            team1_goal_chance = base_chance * (team1_rating / total_rating) * 2
+            team2_goal_chance = base_chance * (team2_rating / total_rating) * 2
+            # Share of extra-time goals scored by team 1
+            team1_prob = team1_rating / total_rating
+            
             # Pre-match commentary (using template for smooth performance)
-            pre_match_commentary = f"Welcome to this exciting African Nations League match between {team1['country']} and {team2['country']}! Both teams are ready for kickoff in what promises to be a thrilling encounter."
-            yield f"data: {json.dumps({'type': 'commentary', 'minute': 0, 'text': pre_match_commentary, 'commentary_type': 'pre_match'})}\n\n"
+            pre_match_commentary = COMMENTARY_TEMPLATES['pre_match'].format_map(match_info)
+            yield {'type': 'commentary', 'minute': 0, 'text': pre_match_commentary, 'commentary_type': 'pre_match'}
             
             # Kickoff
-            kickoff_commentary = f"The referee blows the whistle and we're underway! {team1['country']} kicks off against {team2['country']}."
-            yield f"data: {json.dumps({'type': 'commentary', 'minute': 1, 'text': kickoff_commentary, 'commentary_type': 'kickoff'})}\n\n"
+            kickoff_commentary = COMMENTARY_TEMPLATES['kickoff'].format_map(match_info)
+            yield {'type': 'commentary', 'minute': 1, 'text': kickoff_commentary, 'commentary_type': 'kickoff'}
             
             # Simulate each minute
             for minute in range(1, 94):  # 90 minutes + small buffer
-                time.sleep(0.2)  # 0.2 seconds per minute for faster demo (prevents timeout)
-                
-                # Send keep-alive ping to prevent connection timeout
-                yield f": keepalive\n\n"
+                yield LIVE_MINUTE_SECONDS
                 
-                yield f"data: {json.dumps({'type': 'time_update', 'minute': minute})}\n\n"
+                # The clock update doubles as the connection keep-alive
+                yield {'type': 'time_update', 'minute': minute}
                 
                 # Check for goals independently for each team, weighted by rating
-                team1_rating = team1.get('rating', 50)
-                team2_rating = team2.get('rating', 50)
-                total_rating = team1_rating + team2_rating
-                
-                # Base chance per team per minute (~0.035 avg = ~3.15 goals/game total)
-                # Scaled by team rating so stronger teams score more often
-                base_chance = 0.035
-                team1_goal_chance = base_chance * (team1_rating / total_rating) * 2
-                team2_goal_chance = base_chance * (team2_rating / total_rating) * 2
-                
                 goal_scored_this_minute = False
                 
                 # Team 1 goal check
-                if random.random() < team1_goal_chance:
+                if rand() < team1_goal_chance:
                     team1_goals += 1
                     goal_scored_this_minute = True
-                    attacking_players = [p for p in team1['players'] if p.get('naturalPosition') in ['AT', 'MD']]
-                    scorer = random.choice(attacking_players)['name'] if attacking_players else random.choice(team1['players'])['name']
+                    scorer = choice(team1_scorers)
                     
                     goal_scorers.append({'scorer': scorer, 'team': team1['country'], 'minute': minute})
-                    yield f"data: {json.dumps({'type': 'goal', 'minute': minute, 'scorer': scorer, 'team': team1['country'], 'team_id': 1, 'score': {'team1': team1_goals, 'team2': team2_goals}})}\n\n"
-                    goal_commentary = f"GOAL! {scorer} finds the back of the net for {team1['country']} in the {minute}th minute! What a brilliant strike! The score is now {team1['country']} {team1_goals} - {team2_goals} {team2['country']}."
-                    yield f"data: {json.dumps({'type': 'commentary', 'minute': minute, 'text': goal_commentary, 'commentary_type': 'goal'})}\n\n"
+                    yield {'type': 'goal', 'minute': minute, 'scorer': scorer, 'team': team1['country'], 'team_id': 1, 'score': {'team1': team1_goals, 'team2': team2_goals}}
+                    goal_commentary = COMMENTARY_TEMPLATES['goal_team1'].format(scorer=scorer, minute=minute, score1=team1_goals, score2=team2_goals, **match_info)
+                    yield {'type': 'commentary', 'minute': minute, 'text': goal_commentary, 'commentary_type': 'goal'}
                 
                 # Team 2 goal check (independent of team 1)
-                if random.random() < team2_goal_chance:
+                if rand() < team2_goal_chance:
                     team2_goals += 1
                     goal_scored_this_minute = True
-                    attacking_players = [p for p in team2['players'] if p.get('naturalPosition') in ['AT', 'MD']]
-                    scorer = random.choice(attacking_players)['name'] if attacking_players else random.choice(team2['players'])['name']
+                    scorer = choice(team2_scorers)
                     
                     goal_scorers.append({'scorer': scorer, 'team': team2['country'], 'minute': minute})
-                    yield f"data: {json.dumps({'type': 'goal', 'minute': minute, 'scorer': scorer, 'team': team2['country'], 'team_id': 2, 'score': {'team1': team1_goals, 'team2': team2_goals}})}\n\n"
-                    goal_commentary = f"GOAL! {scorer} scores for {team2['country']} in the {minute}th minute! Brilliant finish! The score is now {team1['country']} {team1_goals} - {team2_goals} {team2['country']}."
-                    yield f"data: {json.dumps({'type': 'commentary', 'minute': minute, 'text': goal_commentary, 'commentary_type': 'goal'})}\n\n"
+                    yield {'type': 'goal', 'minute': minute, 'scorer': scorer, 'team': team2['country'], 'team_id': 2, 'score': {'team1': team1_goals, 'team2': team2_goals}}
+                    goal_commentary = COMMENTARY_TEMPLATES['goal_team2'].format(scorer=scorer, minute=minute, score1=team1_goals, score2=team2_goals, **match_info)
+                    yield {'type': 'commentary', 'minute': minute, 'text': goal_commentary, 'commentary_type': 'goal'}
                 
                 # Random match commentary every few minutes (only if no goal this minute)
-                if not goal_scored_this_minute and minute % 10 == 0 and random.random() < 0.7:
-                    match_situations = [
-                        f"Good attacking play from {random.choice([team1['country'], team2['country']])}",
-                        f"Solid defensive work there from both teams",
-                        f"The midfield battle is heating up between {team1['country']} and {team2['country']}",
-                        f"Corner kick awarded to {random.choice([team1['country'], team2['country']])}",
-                        f"Both teams are looking for that crucial breakthrough",
-                        f"Fast-paced action in the middle of the park",
-                        f"Shot goes wide of the target - close but not close enough",
-                        f"Great save by the goalkeeper! What a reflex stop",
-                        f"The crowd is getting behind their team here"
-                    ]
-                    
-                    commentary = random.choice(match_situations)
-                    yield f"data: {json.dumps({'type': 'commentary', 'minute': minute, 'text': commentary, 'commentary_type': 'match_event'})}\n\n"
+                if not goal_scored_this_minute and minute % 10 == 0 and rand() < 0.7:
+                    commentary = choice(MATCH_SITUATIONS).format(team=choice(match_teams), **match_info)
+                    yield {'type': 'commentary', 'minute': minute, 'text': commentary, 'commentary_type': 'match_event'}
 
                 
                 # Half-time
                 if minute == 45:
-                    halftime_commentary = f"Half-time here and it's {team1['country']} {team1_goals} - {team2_goals} {team2['country']}. What a first half we've witnessed! Both teams will be looking to make their mark in the second period."
-                    yield f"data: {json.dumps({'type': 'commentary', 'minute': minute, 'text': halftime_commentary, 'commentary_type': 'halftime'})}\n\n"
+                    halftime_commentary = COMMENTARY_TEMPLATES['halftime'].format(score1=team1_goals, score2=team2_goals, **match_info)
+                    yield {'type': 'commentary', 'minute': minute, 'text': halftime_commentary, 'commentary_type': 'halftime'}
                 
                 # Second half start
                 elif minute == 46:
-                    second_half_commentary = f"We're back underway for the second half! {team2['country']} gets us started again. Can they find the breakthrough in this second period?"
-                    yield f"data: {json.dumps({'type': 'commentary', 'minute': minute, 'text': second_half_commentary, 'commentary_type': 'second_half'})}\n\n"
+                    second_half_commentary = COMMENTARY_TEMPLATES['second_half'].format_map(match_info)
+                    yield {'type': 'commentary', 'minute': minute, 'text': second_half_commentary, 'commentary_type': 'second_half'}
                 
                 # Full-time at 90 minutes
                 elif minute == 90:
                     if team1_goals != team2_goals:
                         winner = team1 if team1_goals > team2_goals else team2
-                        fulltime_commentary = f"Full-time! {team1['country']} {team1_goals} - {team2_goals} {team2['country']}. What a match! {winner['country']} takes the victory in this thrilling encounter."
-                        yield f"data: {json.dumps({'type': 'commentary', 'minute': minute, 'text': fulltime_commentary, 'commentary_type': 'fulltime'})}\n\n"
+                        fulltime_commentary = COMMENTARY_TEMPLATES['fulltime_win'].format(score1=team1_goals, score2=team2_goals, winner=winner['country'], **match_info)
+                        yield {'type': 'commentary', 'minute': minute, 'text': fulltime_commentary, 'commentary_type': 'fulltime'}
                     else:
-                        fulltime_commentary = f"Full-time and it's all square! {team1['country']} {team1_goals} - {team2_goals} {team2['country']}. We're heading to extra time!"
-                        yield f"data: {json.dumps({'type': 'commentary', 'minute': minute, 'text': fulltime_commentary, 'commentary_type': 'fulltime'})}\n\n"
+                        fulltime_commentary = COMMENTARY_TEMPLATES['fulltime_draw'].format(score1=team1_goals, score2=team2_goals, **match_info)
+                        yield {'type': 'commentary', 'minute': minute, 'text': fulltime_commentary, 'commentary_type': 'fulltime'}
             
             # Extra time if draw (for knockout matches)
             penalties = None
             if team1_goals == team2_goals and match_type != 'group':
                 # Extra time commentary
-                extra_time_start = f"Extra time begins! Both teams have 30 more minutes to find a winner."
-                yield f"data: {json.dumps({'type': 'commentary', 'minute': 91, 'text': extra_time_start, 'commentary_type': 'extra_time'})}\n\n"
+                extra_time_start = COMMENTARY_TEMPLATES['extra_time']
+                yield {'type': 'commentary', 'minute': 91, 'text': extra_time_start, 'commentary_type': 'extra_time'}
                 
                 # Simulate extra time (30 minutes: 91-120)
                 for minute in range(91, 121):
-                    time.sleep(0.2)
-                    yield f": keepalive\n\n"
-                    yield f"data: {json.dumps({'type': 'time_update', 'minute': minute})}\n\n"
-                    
-                    # Higher goal chance in extra time
-                    if random.random() < 0.04:
-                        team1_rating = team1.get('rating', 50)
-                        team2_rating = team2.get('rating', 50)
-                        total_rating = team1_rating + team2_rating
-                        team1_prob = team1_rating / total_rating
+                    yield LIVE_MINUTE_SECONDS
+                    yield {'type': 'time_update', 'minute': minute}
                         
-                        if random.random() < team1_prob:
+                    # Higher goal chance in extra time
+                    if rand() < LIVE_EXTRA_TIME_GOAL_CHANCE_PER_MINUTE:
+                        if rand() < team1_prob:
                             team1_goals += 1
-                            attacking_players = [p for p in team1['players'] if p.get('naturalPosition') in ['AT', 'MD']]
-                            scorer = random.choice(attacking_players)['name'] if attacking_players else random.choice(team1['players'])['name']
+                            scorer = choice(team1_scorers)
                             goal_scorers.append({'scorer': scorer, 'team': team1['country'], 'minute': minute})
                             
-                            yield f"data: {json.dumps({'type': 'goal', 'minute': minute, 'scorer': scorer, 'team': team1['country'], 'team_id': 1, 'score': {'team1': team1_goals, 'team2': team2_goals}})}\n\n"
-                            goal_commentary = f"GOAL in extra time! {scorer} scores for {team1['country']}! The score is now {team1_goals}-{team2_goals}!"
-                            yield f"data: {json.dumps({'type': 'commentary', 'minute': minute, 'text': goal_commentary, 'commentary_type': 'goal'})}\n\n"
+                            yield {'type': 'goal', 'minute': minute, 'scorer': scorer, 'team': team1['country'], 'team_id': 1, 'score': {'team1': team1_goals, 'team2': team2_goals}}
+                            goal_commentary = COMMENTARY_TEMPLATES['extra_time_goal'].format(scorer=scorer, team=team1['country'], score1=team1_goals, score2=team2_goals)
+                            yield {'type': 'commentary', 'minute': minute, 'text': goal_commentary, 'commentary_type': 'goal'}
                         else:
                             team2_goals += 1
-                            attacking_players = [p for p in team2['players'] if p.get('naturalPosition') in ['AT', 'MD']]
-                            scorer = random.choice(attacking_players)['name'] if attacking_players else random.choice(team2['players'])['name']
+                            scorer = choice(team2_scorers)
                             goal_scorers.append({'scorer': scorer, 'team': team2['country'], 'minute': minute})
                             
-                            yield f"data: {json.dumps({'type': 'goal', 'minute': minute, 'scorer': scorer, 'team': team2['country'], 'team_id': 2, 'score': {'team1': team1_goals, 'team2': team2_goals}})}\n\n"
-                            goal_commentary = f"GOAL in extra time! {scorer} scores for {team2['country']}! The score is now {team1_goals}-{team2_goals}!"
-                            yield f"data: {json.dumps({'type': 'commentary', 'minute': minute, 'text': goal_commentary, 'commentary_type': 'goal'})}\n\n"
+                            yield {'type': 'goal', 'minute': minute, 'scorer': scorer, 'team': team2['country'], 'team_id': 2, 'score': {'team1': team1_goals, 'team2': team2_goals}}
+                            goal_commentary = COMMENTARY_TEMPLATES['extra_time_goal'].format(scorer=scorer, team=team2['country'], score1=team1_goals, score2=team2_goals)
+                            yield {'type': 'commentary', 'minute': minute, 'text': goal_commentary, 'commentary_type': 'goal'}
                 
                 # Penalties if still tied
                 if team1_goals == team2_goals:
-                    penalties_commentary = f"Extra time ends {team1_goals}-{team2_goals}. We're going to penalties!"
-                    yield f"data: {json.dumps({'type': 'commentary', 'minute': 120, 'text': penalties_commentary, 'commentary_type': 'penalties_start'})}\n\n"
+                    penalties_commentary = COMMENTARY_TEMPLATES['penalties_start'].format(score1=team1_goals, score2=team2_goals)
+                    yield {'type': 'commentary', 'minute': 120, 'text': penalties_commentary, 'commentary_type': 'penalties_start'}
                     
                     team1_penalties = 0
                     team2_penalties = 0
                     
+                    # Penalty frames are pre-encoded per team; each kick only
+                    # fills in whether it went in and the running score
+                    team1_kick = _penalty_frame_template(team1['country'])
+                    team2_kick = _penalty_frame_template(team2['country'])
+                    
                     # Simulate 5 penalties each
                     for i in range(5):
-                        time.sleep(0.5)
-                        if random.random() < 0.75:
+                        yield LIVE_PENALTY_SECONDS
+                        team1_scores = rand() < PENALTY_SCORE_CHANCE
+                        if team1_scores:
                             team1_penalties += 1
-                            yield f"data: {json.dumps({'type': 'penalty', 'team': team1['country'], 'scored': True, 'penalties': {'team1': team1_penalties, 'team2': team2_penalties}})}\n\n"
-                        else:
-                            yield f"data: {json.dumps({'type': 'penalty', 'team': team1['country'], 'scored': False, 'penalties': {'team1': team1_penalties, 'team2': team2_penalties}})}\n\n"
+                        yield team1_kick % (_JSON_BOOL[team1_scores], team1_penalties, team2_penalties)
                         
-                        time.sleep(0.5)
-                        if random.random() < 0.75:
+                        yield LIVE_PENALTY_SECONDS
+                        team2_scores = rand() < PENALTY_SCORE_CHANCE
+                        if team2_scores:
                             team2_penalties += 1
-                            yield f"data: {json.dumps({'type': 'penalty', 'team': team2['country'], 'scored': True, 'penalties': {'team1': team1_penalties, 'team2': team2_penalties}})}\n\n"
-                        else:
-                            yield f"data: {json.dumps({'type': 'penalty', 'team': team2['country'], 'scored': False, 'penalties': {'team1': team1_penalties, 'team2': team2_penalties}})}\n\n"
+                        yield team2_kick % (_JSON_BOOL[team2_scores], team1_penalties, team2_penalties)
                     
                     # Sudden death if tied
+                    team1_kick = _penalty_frame_template(team1['country'], sudden_death=True)
+                    team2_kick = _penalty_frame_template(team2['country'], sudden_death=True)
                     round_num = 6
                     while team1_penalties == team2_penalties:
-                        time.sleep(0.5)
-                        team1_scores = random.random() < 0.75
+                        yield LIVE_PENALTY_SECONDS
+                        team1_scores = rand() < PENALTY_SCORE_CHANCE
                         if team1_scores:
                             team1_penalties += 1
-                        yield f"data: {json.dumps({'type': 'penalty', 'team': team1['country'], 'scored': team1_scores, 'penalties': {'team1': team1_penalties, 'team2': team2_penalties}, 'sudden_death': True})}\n\n"
+                        yield team1_kick % (_JSON_BOOL[team1_scores], team1_penalties, team2_penalties)
                         
-                        time.sleep(0.5)
-                        team2_scores = random.random() < 0.75
+                        yield LIVE_PENALTY_SECONDS
+                        team2_scores = rand() < PENALTY_SCORE_CHANCE
                         if team2_scores:
                             team2_penalties += 1
-                        yield f"data: {json.dumps({'type': 'penalty', 'team': team2['country'], 'scored': team2_scores, 'penalties': {'team1': team1_penalties, 'team2': team2_penalties}, 'sudden_death': True})}\n\n"
+                        yield team2_kick % (_JSON_BOOL[team2_scores], team1_penalties, team2_penalties)
                         
                         round_num += 1
                         if round_num > 15:  # Safety limit
@@ -814,31 +1637,101 @@ def live_stream_match():
                 'play_by_play': True
             }
             
-            yield f"data: {json.dumps(final_result)}\n\n"
+            yield final_result
             
         except Exception as e:
-            print(f"Error in live stream generator: {e}")
-            yield f"data: {json.dumps({'type': 'error', 'error': str(e)})}\n\n"
+            logger.exception("Error in live stream generator")
+            yield {'type': 'error', 'error': str(e)}
     
+    def generate_live_match():
+        """
+        Generate live match stream with smooth timer progression.
+        The match is simulated up front, so every goal is known before kickoff
+        and the AI reactions to all of them are requested in one Gemini call
+        while the stream plays out. Template commentary is sent straight away;
+        each AI line follows in the first minute after its goal once ready.
+        """
+        events = list(simulate_live_match())
+        goals = [event for event in events if isinstance(event, dict) and event['type'] == 'goal']
+        
+        ai_future = None
+        if goals and gemini_model:
+            ai_future = COMMENTARY_POOL.submit(generate_goal_commentary_batch, team1, team2, goals)
+        goals_shown = 0
+        ai_lines_sent = 0
+        
+        def add_ready_ai_commentary(frames, minute):
+            """Queue AI lines for goals already shown, if the batch has finished"""
+            nonlocal ai_lines_sent
+            if ai_future is None or not ai_future.done() or ai_lines_sent == goals_shown:
+                return
+            for text in ai_future.result()[ai_lines_sent:goals_shown]:
+                if text:
+                    frames.append(_sse({'type': 'commentary', 'minute': minute, 'text': text, 'commentary_type': 'match_event'}))
+            ai_lines_sent = goals_shown
+        
+        try:
+            # Frames due at the same moment are joined and written together, so
+            # one simulated minute (time update, goal, commentary) is one write
+            frames = []
+            minute = 0
+            # Pace against a running deadline so the time spent building and
+            # writing frames does not add up over the match
+            next_tick = time.monotonic()
+            for event in events:
+                if isinstance(event, (int, float)):
+                    if frames:
+                        yield b"".join(frames)
+                        frames = []
+                    next_tick += event
+                    delay = next_tick - time.monotonic()
+                    if delay > 0:
+                        _live_streams_stopping.wait(delay)
+                elif isinstance(event, bytes):
+                    frames.append(event)
+                elif event['type'] == 'time_update':
+                    minute = event['minute']
+                    frames.append(_TIME_UPDATE_FRAME % minute)
+                    add_ready_ai_commentary(frames, minute)
+                else:
+                    if event['type'] == 'match_complete' and ai_future is not None:
+                        # Give late AI commentary a moment to land before the final whistle
+                        if frames:
+                            yield b"".join(frames)
+                            frames = []
+                        wait([ai_future], timeout=AI_COMMENTARY_FINAL_WAIT)
+                        add_ready_ai_commentary(frames, minute)
+                    frames.append(_sse(event))
+                    if event['type'] == 'goal':
+                        goals_shown += 1
+            if frames:
+                yield b"".join(frames)
+        finally:
+            # Client disconnected or match over - drop commentary nobody will see
+            if ai_future is not None:
+                ai_future.cancel()
+    
+    # stream_with_context keeps the request context alive while the generator runs,
+    # so each event is flushed to the client as soon as it is yielded. The frames
+    # are already bytes, so direct_passthrough hands the generator to the server
+    # as-is instead of wrapping it in Werkzeug's encoding iterator
     return Response(
-        generate_live_match(),
+        stream_with_context(generate_live_match()),
         mimetype='text/event-stream',
+        direct_passthrough=True,
         headers={
             'Cache-Control': 'no-cache',
             'Connection': 'keep-alive',
             'X-Accel-Buffering': 'no',  # Disable buffering for nginx/proxy
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Content-Type',
         }
     )
 
 @app.route('/api/matches/save-live-result', methods=['POST'])
 def save_live_match_result():
     """Save live match result to database"""
-    print("SAVE LIVE MATCH RESULT ENDPOINT CALLED")
     try:
         data = request.json
-        print(f" Received live match data: {data}")
+        logger.debug("Received live match data: %s", data)
         
         team1 = data.get('team1', {})
         team2 = data.get('team2', {})
@@ -857,145 +1750,39 @@ def save_live_match_result():
         if not db:
             return jsonify({'error': 'Database not available'}), 500
         
-        print(f"🏟️  Saving live match: {team1.get('country')} {team1_goals} - {team2_goals} {team2.get('country')}")
+        logger.info("Saving live match: %s %s-%s %s", team1.get('country'), team1_goals, team2_goals, team2.get('country'))
         
         # Update bracket in database with match result
-        tournament_doc = db.collection('tournament').document('current').get()
-        if not tournament_doc.exists:
+        bracket, updated = record_match_result(match_type, team1_id, team2_id, {
+            'winner': winner,
+            'score': score_display,
+            'team1_goals': team1_goals,
+            'team2_goals': team2_goals,
+            'goal_scorers': goal_scorers,
+            'commentary': ["Live match - commentary generated during broadcast"],
+            'play_by_play': True
+        })
+        if bracket is None:
             return jsonify({'error': 'Tournament not found'}), 404
-        
-        bracket = tournament_doc.to_dict()
-        
-        # Update the appropriate match based on match_type
-        updated = False
-        if match_type == 'quarterFinal':
-            # Find and update quarter final match
-            for i, match in enumerate(bracket.get('quarterFinals', [])):
-                match_team1 = match.get('team1', {})
-                match_team2 = match.get('team2', {})
-                if ((match_team1.get('id') == team1_id or match_team1.get('id') == team2_id) and
-                    (match_team2.get('id') == team1_id or match_team2.get('id') == team2_id)):
-                    bracket['quarterFinals'][i]['winner'] = winner
-                    bracket['quarterFinals'][i]['score'] = score_display
-                    bracket['quarterFinals'][i]['team1_goals'] = team1_goals
-                    bracket['quarterFinals'][i]['team2_goals'] = team2_goals
-                    bracket['quarterFinals'][i]['goal_scorers'] = goal_scorers
-                    bracket['quarterFinals'][i]['commentary'] = ["Live match - commentary generated during broadcast"]
-                    bracket['quarterFinals'][i]['play_by_play'] = True
-                    updated = True
-                    print(f"✅ Updated quarter final match {i}")
-                    break
-            
-            # Auto-advance to semi-finals when each side's two quarter finals finish
-            if updated:
-                qfs = bracket.get('quarterFinals', [])
-                # Left side: QF 0 vs QF 1
-                if len(qfs) >= 2 and qfs[0].get('winner') and qfs[1].get('winner'):
-                    left_sf = bracket.get('semiFinals', [{}, {}])[0] if bracket.get('semiFinals') else {}
-                    bracket.setdefault('semiFinals', [{}, {}])
-                    bracket['semiFinals'][0] = {
-                        'team1': qfs[0]['winner'],
-                        'team2': qfs[1]['winner'],
-                        'winner': left_sf.get('winner'),
-                        'score': left_sf.get('score'),
-                        'goal_scorers': left_sf.get('goal_scorers', []),
-                        'commentary': left_sf.get('commentary', []),
-                        'team1_goals': left_sf.get('team1_goals'),
-                        'team2_goals': left_sf.get('team2_goals'),
-                        'play_by_play': left_sf.get('play_by_play', False)
-                    }
-                # Right side: QF 2 vs QF 3
-                if len(qfs) >= 4 and qfs[2].get('winner') and qfs[3].get('winner'):
-                    right_sf = bracket.get('semiFinals', [{}, {}])[1] if len(bracket.get('semiFinals', [])) > 1 else {}
-                    bracket['semiFinals'][1] = {
-                        'team1': qfs[2]['winner'],
-                        'team2': qfs[3]['winner'],
-                        'winner': right_sf.get('winner'),
-                        'score': right_sf.get('score'),
-                        'goal_scorers': right_sf.get('goal_scorers', []),
-                        'commentary': right_sf.get('commentary', []),
-                        'team1_goals': right_sf.get('team1_goals'),
-                        'team2_goals': right_sf.get('team2_goals'),
-                        'play_by_play': right_sf.get('play_by_play', False)
-                    }
-        
-        elif match_type == 'semiFinal':
-            # Find and update semi final match
-            for i, match in enumerate(bracket.get('semiFinals', [])):
-                match_team1 = match.get('team1', {})
-                match_team2 = match.get('team2', {})
-                if ((match_team1.get('id') == team1_id or match_team1.get('id') == team2_id) and
-                    (match_team2.get('id') == team1_id or match_team2.get('id') == team2_id)):
-                    bracket['semiFinals'][i]['winner'] = winner
-                    bracket['semiFinals'][i]['score'] = score_display
-                    bracket['semiFinals'][i]['team1_goals'] = team1_goals
-                    bracket['semiFinals'][i]['team2_goals'] = team2_goals
-                    bracket['semiFinals'][i]['goal_scorers'] = goal_scorers
-                    bracket['semiFinals'][i]['commentary'] = ["Live match - commentary generated during broadcast"]
-                    bracket['semiFinals'][i]['play_by_play'] = True
-                    updated = True
-                    print(f"✅ Updated semi final match {i}")
-                    break
-            
-            # Auto-advance to final if both semi finals are complete
-            if updated:
-                sf_complete = all(m.get('winner') for m in bracket.get('semiFinals', []))
-                if sf_complete and not bracket.get('final', {}).get('team1'):
-                    # Advance winners to final
-                    winners = [m['winner'] for m in bracket['semiFinals'] if m.get('winner')]
-                    if len(winners) >= 2:
-                        bracket['final'] = {
-                            'team1': winners[0],
-                            'team2': winners[1],
-                            'winner': None,
-                            'score': None,
-                            'goal_scorers': [],
-                            'commentary': []
-                        }
-        
-        elif match_type == 'final':
-            # Update final match
-            final_match = bracket.get('final', {})
-            match_team1 = final_match.get('team1', {})
-            match_team2 = final_match.get('team2', {})
-            if ((match_team1.get('id') == team1_id or match_team1.get('id') == team2_id) and
-                (match_team2.get('id') == team1_id or match_team2.get('id') == team2_id)):
-                bracket['final']['winner'] = winner
-                bracket['final']['score'] = score_display
-                bracket['final']['team1_goals'] = team1_goals
-                bracket['final']['team2_goals'] = team2_goals
-                bracket['final']['goal_scorers'] = goal_scorers
-                bracket['final']['commentary'] = ["Live match - commentary generated during broadcast"]
-                bracket['final']['play_by_play'] = True
-                updated = True
-                print(f"Updated final match")
-                # Mark tournament as completed
-                bracket['status'] = 'completed'
-        
-        # Save updated bracket
-        if updated:
-            db.collection('tournament').document('current').set(bracket)
-            print(f"Bracket saved successfully")
-            return jsonify({'message': 'Live match result saved successfully', 'bracket': bracket}), 200
-        else:
+        if not updated:
             return jsonify({'error': 'Match not found in bracket'}), 404
+        
+        return jsonify({'message': 'Live match result saved successfully', 'bracket': bracket}), 200
             
     except Exception as e:
-        print(f"Error in save_live_match_result: {e}")
-        return jsonify({'error': str(e)}), 500
+        logger.exception("Error in save_live_match_result")
+        return error_response(e)
 
 @app.route('/api/matches/simulate', methods=['POST'])
 def simulate_match():
     """Simulate a match without detailed commentary"""
-    print("⚡ SIMULATE MATCH ENDPOINT CALLED - NO COMMENTARY")
     return simulate_match_internal(play_by_play=False)
 
 def simulate_match_internal(play_by_play=False):
     """Internal function to simulate matches with or without commentary"""
     try:
         data = request.json
-        print(f"Received request: {data}")
-        print(f"Play by play mode: {play_by_play}")
+        logger.debug("Received match request: %s (play by play: %s)", data, play_by_play)
         
         team1_id = data.get('team1_id')
         team2_id = data.get('team2_id')
@@ -1008,20 +1795,11 @@ def simulate_match_internal(play_by_play=False):
             return jsonify({'error': 'Database not available'}), 500
         
         # Get team data
-        team1_doc = db.collection('teams').document(team1_id).get()
-        team2_doc = db.collection('teams').document(team2_id).get()
+        team1, team2 = get_teams_by_id([team1_id, team2_id])
         
-        if not team1_doc.exists or not team2_doc.exists:
+        if team1 is None or team2 is None:
             return jsonify({'error': 'One or both teams not found'}), 404
         
-        team1 = team1_doc.to_dict()
-        team2 = team2_doc.to_dict()
-        team1['id'] = team1_id
-        team2['id'] = team2_id
-        
-        print(f"Match: {team1['country']} vs {team2['country']}")
-        print(f"Commentary requested: {play_by_play}")
-        
         # Simulate match based on team ratings
         team1_rating = team1.get('rating', 50)
         team2_rating = team2.get('rating', 50)
@@ -1031,18 +1809,45 @@ def simulate_match_internal(play_by_play=False):
         team1_prob = team1_rating / total_rating
         
         # Enhanced match simulation
+        rand = SIM_RNG.random
+        choice = SIM_RNG.choice
+        team1_scorers = goal_scorer_candidates(team1)
+        team2_scorers = goal_scorer_candidates(team2)
         team1_goals = 0
         team2_goals = 0
         goal_scorers = []
         
         # Normal time simulation (90 minutes)
-        for minute in range(1, 91):
-            if random.random() < 0.015:  # 1.5% chance of goal per minute
-                if random.random() < team1_prob:
+        for minute in goal_minutes(1, 90, GOAL_CHANCE_PER_MINUTE, rand):
+            if rand() < team1_prob:
+                team1_goals += 1
+                # Prefer attacking and midfield players as scorers
+                scorer = choice(team1_scorers)
+                goal_scorers.append({
+                    'scorer': scorer,
+                    'team': team1['country'],
+                    'minute': minute
+                })
+            else:
+                team2_goals += 1
+                scorer = choice(team2_scorers)
+                goal_scorers.append({
+                    'scorer': scorer,
+                    'team': team2['country'],
+                    'minute': minute
+                })
+        
+        # Extra time if draw in knockout stages
+        extra_time_goals = 0
+        penalties = None
+        
+        if team1_goals == team2_goals and match_type != 'group':
+            # Extra time (30 minutes)
+            for minute in goal_minutes(91, 120, EXTRA_TIME_GOAL_CHANCE_PER_MINUTE, rand):  # Higher chance in extra time
+                if rand() < team1_prob:
                     team1_goals += 1
-                    # Prefer attacking and midfield players as scorers
-                    attacking_players = [p for p in team1['players'] if p['naturalPosition'] in ['AT', 'MD']]
-                    scorer = random.choice(attacking_players)['name'] if attacking_players else random.choice(team1['players'])['name']
+                    extra_time_goals += 1
+                    scorer = choice(team1_scorers)
                     goal_scorers.append({
                         'scorer': scorer,
                         'team': team1['country'],
@@ -1050,42 +1855,13 @@ def simulate_match_internal(play_by_play=False):
                     })
                 else:
                     team2_goals += 1
-                    attacking_players = [p for p in team2['players'] if p['naturalPosition'] in ['AT', 'MD']]
-                    scorer = random.choice(attacking_players)['name'] if attacking_players else random.choice(team2['players'])['name']
+                    extra_time_goals += 1
+                    scorer = choice(team2_scorers)
                     goal_scorers.append({
                         'scorer': scorer,
                         'team': team2['country'],
                         'minute': minute
                     })
-        
-        # Extra time if draw in knockout stages
-        extra_time_goals = 0
-        penalties = None
-        
-        if team1_goals == team2_goals and match_type != 'group':
-            # Extra time (30 minutes)
-            for minute in range(91, 121):
-                if random.random() < 0.02:  # Higher chance in extra time
-                    if random.random() < team1_prob:
-                        team1_goals += 1
-                        extra_time_goals += 1
-                        attacking_players = [p for p in team1['players'] if p['naturalPosition'] in ['AT', 'MD']]
-                        scorer = random.choice(attacking_players)['name'] if attacking_players else random.choice(team1['players'])['name']
-                        goal_scorers.append({
-                            'scorer': scorer,
-                            'team': team1['country'],
-                            'minute': minute
-                        })
-                    else:
-                        team2_goals += 1
-                        extra_time_goals += 1
-                        attacking_players = [p for p in team2['players'] if p['naturalPosition'] in ['AT', 'MD']]
-                        scorer = random.choice(attacking_players)['name'] if attacking_players else random.choice(team2['players'])['name']
-                        goal_scorers.append({
-                            'scorer': scorer,
-                            'team': team2['country'],
-                            'minute': minute
-                        })
             
             # Penalties if still draw
             if team1_goals == team2_goals:
@@ -1094,16 +1870,16 @@ def simulate_match_internal(play_by_play=False):
                 
                 # Simulate penalty shootout (5 penalties each)
                 for i in range(5):
-                    if random.random() < 0.75:  # 75% chance to score penalty
+                    if rand() < PENALTY_SCORE_CHANCE:
                         team1_penalties += 1
-                    if random.random() < 0.75:
+                    if rand() < PENALTY_SCORE_CHANCE:
                         team2_penalties += 1
                 
                 # Sudden death if still tied
                 while team1_penalties == team2_penalties:
-                    if random.random() < 0.75:
+                    if rand() < PENALTY_SCORE_CHANCE:
                         team1_penalties += 1
-                    if random.random() < 0.75:
+                    if rand() < PENALTY_SCORE_CHANCE:
                         team2_penalties += 1
                     # Stop when one team misses and the other scores
                     if team1_penalties != team2_penalties:
@@ -1130,11 +1906,8 @@ def simulate_match_internal(play_by_play=False):
         # Generate commentary based on play_by_play flag
         commentary = []
         if play_by_play:
-            print("GENERATING AI COMMENTARY - Play by play mode is ON")
             commentary = generate_ai_commentary(team1, team2, team1_goals, team2_goals, goal_scorers)
-            print(f"COMMENTARY RESULT: {len(commentary)} lines generated")
         else:
-            print("SKIPPING COMMENTARY - Play by play mode is OFF")
             commentary = ["Match was simulated - no commentary available"]
         
         match_result = {
@@ -1155,124 +1928,17 @@ def simulate_match_internal(play_by_play=False):
         # Update bracket in database with match result
         if db:
             try:
-                tournament_doc = db.collection('tournament').document('current').get()
-                if tournament_doc.exists:
-                    bracket = tournament_doc.to_dict()
-                    
-                    # Update the appropriate match based on match_type
-                    updated = False
-                    if match_type == 'quarterFinal':
-                        # Find and update quarter final match
-                        for i, match in enumerate(bracket.get('quarterFinals', [])):
-                            match_team1 = match.get('team1', {})
-                            match_team2 = match.get('team2', {})
-                            if ((match_team1.get('id') == team1_id or match_team1.get('id') == team2_id) and
-                                (match_team2.get('id') == team1_id or match_team2.get('id') == team2_id)):
-                                bracket['quarterFinals'][i]['winner'] = winner
-                                bracket['quarterFinals'][i]['score'] = score_display
-                                bracket['quarterFinals'][i]['team1_goals'] = team1_goals
-                                bracket['quarterFinals'][i]['team2_goals'] = team2_goals
-                                bracket['quarterFinals'][i]['goal_scorers'] = goal_scorers
-                                bracket['quarterFinals'][i]['commentary'] = commentary
-                                bracket['quarterFinals'][i]['play_by_play'] = play_by_play
-                                updated = True
-                                break
-                        
-                        # Auto-advance to semi-finals when each side's two quarter finals finish
-                        if updated:
-                            qfs = bracket.get('quarterFinals', [])
-                            # Left side: QF 0 vs QF 1
-                            if len(qfs) >= 2 and qfs[0].get('winner') and qfs[1].get('winner'):
-                                bracket.setdefault('semiFinals', [{}, {}])
-                                while len(bracket['semiFinals']) < 2:
-                                    bracket['semiFinals'].append({})
-                                left_sf = bracket['semiFinals'][0] or {}
-                                bracket['semiFinals'][0] = {
-                                    'team1': qfs[0]['winner'],
-                                    'team2': qfs[1]['winner'],
-                                    'winner': left_sf.get('winner'),
-                                    'score': left_sf.get('score'),
-                                    'goal_scorers': left_sf.get('goal_scorers', []),
-                                    'commentary': left_sf.get('commentary', []),
-                                    'team1_goals': left_sf.get('team1_goals'),
-                                    'team2_goals': left_sf.get('team2_goals'),
-                                    'play_by_play': left_sf.get('play_by_play', False)
-                                }
-                            # Right side: QF 2 vs QF 3
-                            if len(qfs) >= 4 and qfs[2].get('winner') and qfs[3].get('winner'):
-                                bracket.setdefault('semiFinals', [{}, {}])
-                                while len(bracket['semiFinals']) < 2:
-                                    bracket['semiFinals'].append({})
-                                right_sf = bracket['semiFinals'][1] or {}
-                                bracket['semiFinals'][1] = {
-                                    'team1': qfs[2]['winner'],
-                                    'team2': qfs[3]['winner'],
-                                    'winner': right_sf.get('winner'),
-                                    'score': right_sf.get('score'),
-                                    'goal_scorers': right_sf.get('goal_scorers', []),
-                                    'commentary': right_sf.get('commentary', []),
-                                    'team1_goals': right_sf.get('team1_goals'),
-                                    'team2_goals': right_sf.get('team2_goals'),
-                                    'play_by_play': right_sf.get('play_by_play', False)
-                                }
-                    
-                    elif match_type == 'semiFinal':
-                        # Find and update semi final match
-                        for i, match in enumerate(bracket.get('semiFinals', [])):
-                            match_team1 = match.get('team1', {})
-                            match_team2 = match.get('team2', {})
-                            if ((match_team1.get('id') == team1_id or match_team1.get('id') == team2_id) and
-                                (match_team2.get('id') == team1_id or match_team2.get('id') == team2_id)):
-                                bracket['semiFinals'][i]['winner'] = winner
-                                bracket['semiFinals'][i]['score'] = score_display
-                                bracket['semiFinals'][i]['team1_goals'] = team1_goals
-                                bracket['semiFinals'][i]['team2_goals'] = team2_goals
-                                bracket['semiFinals'][i]['goal_scorers'] = goal_scorers
-                                bracket['semiFinals'][i]['commentary'] = commentary
-                                bracket['semiFinals'][i]['play_by_play'] = play_by_play
-                                updated = True
-                                break
-                        
-                        # Auto-advance to final if both semi finals are complete
-                        if updated:
-                            sf_complete = all(m.get('winner') for m in bracket.get('semiFinals', []))
-                            if sf_complete and not bracket.get('final', {}).get('team1'):
-                                # Advance winners to final
-                                winners = [m['winner'] for m in bracket['semiFinals'] if m.get('winner')]
-                                if len(winners) >= 2:
-                                    bracket['final'] = {
-                                        'team1': winners[0],
-                                        'team2': winners[1],
-                                        'winner': None,
-                                        'score': None,
-                                        'goal_scorers': [],
-                                        'commentary': []
-                                    }
-                    
-                    elif match_type == 'final':
-                        # Update final match
-                        final_match = bracket.get('final', {})
-                        match_team1 = final_match.get('team1', {})
-                        match_team2 = final_match.get('team2', {})
-                        if ((match_team1.get('id') == team1_id or match_team1.get('id') == team2_id) and
-                            (match_team2.get('id') == team1_id or match_team2.get('id') == team2_id)):
-                            bracket['final']['winner'] = winner
-                            bracket['final']['score'] = score_display
-                            bracket['final']['team1_goals'] = team1_goals
-                            bracket['final']['team2_goals'] = team2_goals
-                            bracket['final']['goal_scorers'] = goal_scorers
-                            bracket['final']['commentary'] = commentary
-                            bracket['final']['play_by_play'] = play_by_play
-                            updated = True
-                            # Mark tournament as completed
-                            bracket['status'] = 'completed'
-                    
-                    # Save updated bracket
-                    if updated:
-                        db.collection('tournament').document('current').set(bracket)
-                    
-            except Exception as e:
-                print(f"Error updating bracket: {e}")
+                record_match_result(match_type, team1_id, team2_id, {
+                    'winner': winner,
+                    'score': score_display,
+                    'team1_goals': team1_goals,
+                    'team2_goals': team2_goals,
+                    'goal_scorers': goal_scorers,
+                    'commentary': commentary,
+                    'play_by_play': play_by_play
+                })
+            except Exception:
+                logger.exception("Error updating bracket")
         
         # Send email notifications (only if configured)
         if EMAIL_USER and EMAIL_PASSWORD:
@@ -1297,20 +1963,23 @@ Goal Scorers:
                 
                 email_body += "\n\nThank you for participating in the African Nations League!"
                 
-                # Send to both team representatives
-                send_email(team1.get('email', ''), email_subject, email_body)
-                send_email(team2.get('email', ''), email_subject, email_body)
-            except Exception as e:
-                print(f"Email notification error: {e}")
+                # Send to both team representatives over one SMTP session, in
+                # the background so the response does not wait on SMTP
+                EMAIL_EXECUTOR.submit(send_emails_bulk, [
+                    (team1.get('email', ''), email_subject, email_body),
+                    (team2.get('email', ''), email_subject, email_body)
+                ])
+            except Exception:
+                logger.exception("Email notification error")
         else:
-            print("Email not configured - skipping email notifications")
+            logger.debug("Email not configured - skipping email notifications")
         
-        print(f"Match simulation completed: {score_display}")
+        logger.info("Match simulated: %s %s %s", team1['country'], score_display, team2['country'])
         return jsonify({'match_result': match_result}), 200
         
     except Exception as e:
-        print(f"Error in simulate_match_internal: {e}")
-        return jsonify({'error': str(e)}), 500
+        logger.exception("Error in simulate_match_internal")
+        return error_response(e)
 
 @app.route('/api/tournament/reset', methods=['POST'])
 def reset_tournament():
@@ -1321,143 +1990,156 @@ def reset_tournament():
         
         # Delete current tournament
         try:
-            db.collection('tournament').document('current').delete()
+            TOURNAMENT_DOC.delete()
         except:
             pass
         
-        # Reset all teams status
+        # Reset all teams status. Only teams not already registered need a
+        # write, and only their document references are needed, so skip
+        # downloading each team's squad
         try:
-            teams = db.collection('teams').stream()
-            for team_doc in teams:
-                db.collection('teams').document(team_doc.id).update({'status': 'registered'})
-        except Exception as e:
-            print(f"Error resetting teams: {e}")
-        
+            teams = TEAMS_COL.where(filter=FieldFilter('status', '!=', 'registered')).select([]).stream()
+            bulk_write(((team_doc.reference, {'status': 'registered'}) for team_doc in teams), merge=True)
+        except Exception:
+            logger.exception("Error resetting teams")
+        
+        invalidate_team_cache()
+        invalidate_tournament_cache()
+        invalidate_response_cache()
         return jsonify({'message': 'Tournament reset successfully'}), 200
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
+
+# Rounds in the order they are reported, with their history labels
+BRACKET_ROUNDS = (('quarterFinals', 'Quarter Final'), ('semiFinals', 'Semi Final'), ('final', 'Final'))
+
+def played_matches(bracket):
+    """(round label, match) for every match in the bracket that has a result"""
+    for field, label in BRACKET_ROUNDS:
+        matches = bracket.get(field) or []
+        if isinstance(matches, dict):
+            matches = [matches]
+        for match in matches:
+            if match and match.get('score'):
+                yield label, match
+
+def compute_tournament_stats(bracket):
+    """
+    Goal scorers, match history and per-team records for a bracket, worked
+    out in a single pass over its played matches
+    """
+    scorers = {}
+    history = []
+    records = {}
+    
+    for label, match in played_matches(bracket):
+        team1 = match.get('team1') or {}
+        team2 = match.get('team2') or {}
+        winner = match.get('winner')
+        history.append({
+            'round': label,
+            'team1': team1.get('country', 'Unknown'),
+            'team2': team2.get('country', 'Unknown'),
+            'score': match.get('score', 'N/A'),
+            'winner': winner.get('country', 'Draw') if winner else 'Draw',
+            'play_by_play': match.get('play_by_play', False),
+            'commentary': match.get('commentary', [])
+        })
+        
+        for goal in match.get('goal_scorers') or ():
+            scorer = goal['scorer']
+            if scorer not in scorers:
+                scorers[scorer] = {'name': scorer, 'goals': 0, 'team': goal['team']}
+            scorers[scorer]['goals'] += 1
+        
+        team1_goals = match.get('team1_goals', 0)
+        team2_goals = match.get('team2_goals', 0)
+        for team, scored, conceded in ((team1, team1_goals, team2_goals), (team2, team2_goals, team1_goals)):
+            if not team.get('id'):
+                continue
+            record = records.setdefault(team['id'], {
+                'matches_played': 0, 'wins': 0, 'losses': 0, 'draws': 0,
+                'goals_scored': 0, 'goals_conceded': 0
+            })
+            record['matches_played'] += 1
+            record['goals_scored'] += scored
+            record['goals_conceded'] += conceded
+            if scored > conceded:
+                record['wins'] += 1
+            elif scored < conceded:
+                record['losses'] += 1
+            else:
+                record['draws'] += 1
+    
+    return {
+        'goal_scorers': sorted(scorers.values(), key=lambda x: x['goals'], reverse=True),
+        'matches': history,
+        'team_records': records
+    }
+
+# Stats for the bracket they were computed from. get_current_tournament()
+# returns the same bracket object until the next write, so the three stats
+# endpoints share one pass per bracket version
+_tournament_stats = (None, None)
+
+def get_tournament_stats(bracket):
+    """compute_tournament_stats(bracket), reused while the bracket is unchanged"""
+    global _tournament_stats
+    cached_bracket, stats = _tournament_stats
+    if cached_bracket is not bracket:
+        stats = compute_tournament_stats(bracket)
+        _tournament_stats = (bracket, stats)
+    return stats
 
 @app.route('/api/goal-scorers', methods=['GET'])
+@cached_response
 def get_goal_scorers():
-    """Get goal scorers ranking"""
+    """Get goal scorers leaderboard"""
     try:
         if not db:
             return jsonify({'goal_scorers': []}), 200
         
-        # Get all matches and compile goal scorers
-        goal_scorers_dict = {}
-        
-        # Check if we have tournament data
-        tournament_doc = db.collection('tournament').document('current').get()
-        if tournament_doc.exists:
-            bracket = tournament_doc.to_dict()
-            
-            # Function to process matches and extract goal scorers
-            def process_matches(matches):
-                for match in matches:
-                    if match.get('goal_scorers'):
-                        for goal in match['goal_scorers']:
-                            scorer = goal['scorer']
-                            if scorer not in goal_scorers_dict:
-                                goal_scorers_dict[scorer] = {
-                                    'name': scorer,
-                                    'goals': 0,
-                                    'team': goal['team']
-                                }
-                            goal_scorers_dict[scorer]['goals'] += 1
-            
-            # Process all rounds
-            if 'quarterFinals' in bracket:
-                process_matches(bracket['quarterFinals'])
-            if 'semiFinals' in bracket:
-                process_matches(bracket['semiFinals'])
-            if 'final' in bracket:
-                if bracket['final'].get('goal_scorers'):
-                    process_matches([bracket['final']])
-        
-        # Convert to sorted list
-        scorers_list = sorted(goal_scorers_dict.values(), key=lambda x: x['goals'], reverse=True)
+        bracket = get_current_tournament()
+        scorers_list = get_tournament_stats(bracket)['goal_scorers'] if bracket else []
         
         return jsonify({'goal_scorers': scorers_list}), 200
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
 
 @app.route('/api/matches/history', methods=['GET'])
+@cached_response
 def get_match_history():
     """Get all match history"""
     try:
         if not db:
             return jsonify({'matches': []}), 200
         
-        matches = []
-        tournament_doc = db.collection('tournament').document('current').get()
-        if tournament_doc.exists:
-            bracket = tournament_doc.to_dict()
-            
-            # Extract matches from all rounds
-            if 'quarterFinals' in bracket:
-                for match in bracket['quarterFinals']:
-                    if match.get('score'):
-                        matches.append({
-                            'round': 'Quarter Final',
-                            'team1': match.get('team1', {}).get('country', 'Unknown'),
-                            'team2': match.get('team2', {}).get('country', 'Unknown'),
-                            'score': match.get('score', 'N/A'),
-                            'winner': match.get('winner', {}).get('country', 'Draw') if match.get('winner') else 'Draw',
-                            'play_by_play': match.get('play_by_play', False),
-                            'commentary': match.get('commentary', [])
-                        })
-            
-            if 'semiFinals' in bracket:
-                for match in bracket['semiFinals']:
-                    if match.get('score'):
-                        matches.append({
-                            'round': 'Semi Final',
-                            'team1': match.get('team1', {}).get('country', 'Unknown'),
-                            'team2': match.get('team2', {}).get('country', 'Unknown'),
-                            'score': match.get('score', 'N/A'),
-                            'winner': match.get('winner', {}).get('country', 'Draw') if match.get('winner') else 'Draw',
-                            'play_by_play': match.get('play_by_play', False),
-                            'commentary': match.get('commentary', [])
-                        })
-            
-            if 'final' in bracket and bracket['final'].get('score'):
-                final = bracket['final']
-                matches.append({
-                    'round': 'Final',
-                    'team1': final.get('team1', {}).get('country', 'Unknown'),
-                    'team2': final.get('team2', {}).get('country', 'Unknown'),
-                    'score': final.get('score', 'N/A'),
-                    'winner': final.get('winner', {}).get('country', 'Draw') if final.get('winner') else 'Draw',
-                    'play_by_play': final.get('play_by_play', False),
-                    'commentary': final.get('commentary', [])
-                })
+        bracket = get_current_tournament()
+        matches = get_tournament_stats(bracket)['matches'] if bracket else []
         
         return jsonify({'matches': matches}), 200
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
 
 @app.route('/api/teams/<team_id>/analytics', methods=['GET'])
+@cached_response
 def get_team_analytics(team_id):
     """Get team performance analytics"""
     try:
         if not db:
             return jsonify({'analytics': {}}), 200
         
-        # Get team data
-        team_doc = db.collection('teams').document(team_id).get()
-        if not team_doc.exists:
+        # Get team data (from the team cache when a match has already used it)
+        team, = get_teams_by_id([team_id])
+        if team is None:
             return jsonify({'error': 'Team not found'}), 404
         
-        team = team_doc.to_dict()
-        team_name = team.get('country', 'Unknown')
-        
         # Initialize analytics
         analytics = {
-            'team_name': team_name,
+            'team_name': team.get('country', 'Unknown'),
             'matches_played': 0,
             'wins': 0,
             'losses': 0,
@@ -1466,57 +2148,21 @@ def get_team_analytics(team_id):
             'goals_conceded': 0
         }
         
-        # Calculate analytics from tournament data
-        tournament_doc = db.collection('tournament').document('current').get()
-        if tournament_doc.exists:
-            bracket = tournament_doc.to_dict()
-            
-            def process_matches(matches):
-                for match in matches:
-                    if match.get('score'):
-                        team1 = match.get('team1', {})
-                        team2 = match.get('team2', {})
-                        
-                        # Check if our team is in this match
-                        if team1.get('id') == team_id or team2.get('id') == team_id:
-                            analytics['matches_played'] += 1
-                            
-                            team1_goals = match.get('team1_goals', 0)
-                            team2_goals = match.get('team2_goals', 0)
-                            
-                            if team1.get('id') == team_id:
-                                analytics['goals_scored'] += team1_goals
-                                analytics['goals_conceded'] += team2_goals
-                                
-                                if team1_goals > team2_goals:
-                                    analytics['wins'] += 1
-                                elif team1_goals < team2_goals:
-                                    analytics['losses'] += 1
-                                else:
-                                    analytics['draws'] += 1
-                            else:
-                                analytics['goals_scored'] += team2_goals
-                                analytics['goals_conceded'] += team1_goals
-                                
-                                if team2_goals > team1_goals:
-                                    analytics['wins'] += 1
-                                elif team2_goals < team1_goals:
-                                    analytics['losses'] += 1
-                                else:
-                                    analytics['draws'] += 1
-            
-            # Process all rounds
-            if 'quarterFinals' in bracket:
-                process_matches(bracket['quarterFinals'])
-            if 'semiFinals' in bracket:
-                process_matches(bracket['semiFinals'])
-            if 'final' in bracket and bracket['final'].get('score'):
-                process_matches([bracket['final']])
+        # Fill in the team's record from tournament data
+        bracket = get_current_tournament()
+        if bracket:
+            analytics.update(get_tournament_stats(bracket)['team_records'].get(team_id, {}))
         
         return jsonify({'analytics': analytics}), 200
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
+
+# A successful Gemini test is reused for a few minutes, so polling the debug
+# endpoint does not spend a paid API call on every hit
+GEMINI_PROBE_TTL = 300
+_gemini_probe_lock = threading.Lock()
+_gemini_probe = {'expires': 0.0, 'result': None}
 
 @app.route('/api/debug/gemini', methods=['GET'])
 def debug_gemini():
@@ -1530,17 +2176,26 @@ def debug_gemini():
                 'api_key_set': bool(GEMINI_API_KEY)
             }), 200
         
-        # Test with a simple prompt
-        test_prompt = "Say 'Gemini is working' in an excited football commentator style."
-        response = gemini_model.generate_content(test_prompt)
+        # Concurrent checks wait for one test call instead of each making one
+        with _gemini_probe_lock:
+            if time.monotonic() < _gemini_probe['expires']:
+                return jsonify(_gemini_probe['result']), 200
+            
+            # Test with a simple prompt
+            test_prompt = "Say 'Gemini is working' in an excited football commentator style."
+            response = generate_content(gemini_model, test_prompt)
+            
+            result = {
+                'status': 'success',
+                'message': 'Gemini API is working',
+                'gemini_available': True,
+                'api_key_set': bool(GEMINI_API_KEY),
+                'test_response': response.text
+            }
+            _gemini_probe['result'] = result
+            _gemini_probe['expires'] = time.monotonic() + GEMINI_PROBE_TTL
         
-        return jsonify({
-            'status': 'success',
-            'message': 'Gemini API is working',
-            'gemini_available': True,
-            'api_key_set': bool(GEMINI_API_KEY),
-            'test_response': response.text
-        }), 200
+        return jsonify(result), 200
         
     except Exception as e:
         return jsonify({
@@ -1555,11 +2210,14 @@ if __name__ == '__main__':
     required_env_vars = ['GEMINI_API_KEY']
     missing_vars = [var for var in required_env_vars if not os.getenv(var)]
     if missing_vars:
-        print(f"Warning: Missing environment variables: {missing_vars}")
+        logger.warning("Missing environment variables: %s", missing_vars)
+    
+    init_firebase()
+    init_gemini()
     
-    print("Starting African Nations League API Server...")
-    print(f"Gemini AI Available: {gemini_model is not None}")
-    print(f"Email Notifications: {bool(EMAIL_USER and EMAIL_PASSWORD)}")
+    logger.info("Starting African Nations League API Server...")
+    logger.info("Gemini AI Available: %s", gemini_model is not None)
+    logger.info("Email Notifications: %s", bool(EMAIL_USER and EMAIL_PASSWORD))
     import os
     port = int(os.environ.get('PORT', 5000))
     app.run(debug=False, host='0.0.0.0', port=port)
\ No newline at end of file
@@ -1,19 +1,48 @@
 # Gunicorn configuration for Render deployment
 # Increases timeout to allow long-running SSE streams
 
+import os
+import signal
+
 # Worker timeout - set to 300 seconds (5 minutes) to allow full match simulation
 timeout = 300
 
 # Keep-alive timeout
 keepalive = 5
 
-# Worker class for async/streaming support
-worker_class = 'sync'
+# Threaded workers so one worker can serve many concurrent requests.
+# The app is I/O bound (Firestore, Gemini, SMTP) and every live match stream
+# holds its connection open for the whole simulation, so a sync worker would
+# serialize all users behind a single stream. gevent is not used because the
+# Firestore client talks gRPC, which does not cooperate with monkey-patching.
+worker_class = 'gthread'
 
 # Number of workers
 workers = 1
 
+# Threads per worker (concurrent requests / live streams per worker).
+# A live match stream holds a thread for its whole run while mostly sleeping
+# between minutes, so allow plenty of them; override with GUNICORN_THREADS
+threads = int(os.getenv('GUNICORN_THREADS', 32))
+
 # Logging
 accesslog = '-'
 errorlog = '-'
 loglevel = 'info'
+
+
+def post_worker_init(worker):
+    """Create the Firebase and Gemini clients as soon as each worker has loaded the app"""
+    from app import init_firebase, init_gemini, stop_live_streams
+    init_firebase()
+    init_gemini()
+    
+    # On graceful shutdown (SIGTERM, e.g. a redeploy) let open live match streams
+    # play out to full time right away instead of being killed after graceful_timeout
+    handle_exit = worker.handle_exit
+    
+    def handle_exit_and_stop_streams(sig, frame):
+        stop_live_streams()
+        handle_exit(sig, frame)
+    
+    signal.signal(signal.SIGTERM, handle_exit_and_stop_streams)